@@ -1,10 +1,16 @@
+import asyncio
+import bisect
+import concurrent.futures
+import functools
+import inspect
 import logging
+import threading
 import typing
 from typing import Iterable
 
 from django.apps import AppConfig
 
-from gdaps.exceptions import PluginError
+from gdaps.exceptions import PluginError, InterfaceCallError
 
 
 __all__ = ["Interface", "require_app"]
@@ -14,6 +20,10 @@ default_app_config = "gdaps.apps.GdapsConfig"
 
 logger = logging.getLogger(__name__)
 
+# shared thread pool for InterfaceMeta.call_parallel(), created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
 
 class InterfaceMeta(type):
     """Metaclass of Interfaces and Implementations
@@ -41,6 +51,18 @@ class InterfaceMeta(type):
             # class shouldn't be registered as a plugin. Instead, it sets up a
             # list where plugins can be registered later.
             cls._implementations = []
+            # weights of the implementations, to keep _implementations sorted
+            cls._weights = []
+            # precomputed tuple of enabled implementations, used by __iter__
+            cls._enabled_implementations = ()
+            # set of implementation classes, used by __contains__
+            cls._implementation_classes = set()
+            # True if enabled implementations contain not yet instantiated lazy services
+            cls._lazy_pending = False
+            # cached tuples of bound methods of enabled implementations, per method name
+            cls._bound_methods = {}
+            # cached tuples of awaitable callables of enabled implementations, per method name
+            cls._async_methods = {}
             cls.__interface__ = True
         else:
             cls.___interface__ = False
@@ -48,30 +70,231 @@ class InterfaceMeta(type):
             # Simply appending it to the list is all that's needed to keep
             # track of it later.
             service = getattr(cls, "__service__", True)
-            if service:
+            if service and getattr(cls, "__lazy__", False):
+                # lazy services are instantiated when they are used first
+                plugin = LazyService(cls)
+            elif service:
                 plugin = cls()
             else:
                 plugin = cls
 
+            # detect coroutine methods once, for InterfaceMeta.acall()
+            cls._coroutine_methods = _coroutine_methods(cls)
+
+            # remember the interfaces this implementation is registered in,
+            # so that changes of its "enabled" flag can update their caches.
+            cls._registered_in = []
             for base in bases:
                 # if hasattr(base, "___interface__"):
                 # if getattr(base, "__service__", True) == service:
                 if hasattr(base, "_implementations"):
-                    base._implementations.append(plugin)
+                    interface = _owning_interface(base)
+                    # keep implementations sorted by weight, in declaration order for equal weights
+                    weight = getattr(cls, "weight", 0)
+                    index = bisect.bisect_right(interface._weights, weight)
+                    interface._weights.insert(index, weight)
+                    interface._implementations.insert(index, plugin)
+                    interface._implementation_classes.add(cls)
+                    cls._registered_in.append(interface)
+                    _update_enabled_implementations(interface)
                 # else:
                 #     raise PluginError(
                 #         "A Plugin can't implement service AND non-service "
                 #         "interfaces at the same time. "
                 #     )
 
+    def __setattr__(cls, name, value) -> None:
+        super().__setattr__(name, value)
+        if name == "enabled":
+            _enabled_flag_changed(cls)
+
+    def __delattr__(cls, name) -> None:
+        super().__delattr__(name)
+        if name == "enabled":
+            _enabled_flag_changed(cls)
+
     def __iter__(mcs) -> typing.Iterable:
-        return iter(
-            # return only enabled plugins
-            impl
-            for impl in mcs._implementations
-            if getattr(impl, "enabled", True)
+        if mcs._lazy_pending:
+            _instantiate_lazy_services(
+                _owning_interface(mcs), lambda impl: getattr(impl, "enabled", True)
+            )
+        # return only enabled plugins
+        return iter(mcs._enabled_implementations)
+
+    def warm_up(cls, *implementations: type) -> None:
+        """Instantiates lazy services of this interface in advance.
+
+        :param implementations: the implementation classes to instantiate. If omitted, all lazy
+            services of this interface are instantiated.
+        """
+        _instantiate_lazy_services(
+            _owning_interface(cls),
+            lambda impl: not implementations or impl._lazy_cls in implementations,
         )
 
+    def call(cls, method: str, *args, **kwargs) -> list:
+        """Calls a method of all enabled implementations, and returns a list of their results.
+
+        .. code-block:: python
+
+            results = IFooInterface.call("do_something", 42, foo="bar")
+
+        :param method: the name of the method to call
+        :param args: positional arguments passed to each method
+        :param kwargs: keyword arguments passed to each method
+        """
+        methods = _bound_methods(cls, method)
+        if kwargs:
+            return [func(*args, **kwargs) for func in methods]
+        return [func(*args) for func in methods]
+
+    def call_first(cls, method: str, *args, **kwargs):
+        """Calls a method of the enabled implementations until one returns a result that is not None.
+
+        Returns that result, or None if no implementation returned one.
+        """
+        for func in _bound_methods(cls, method):
+            result = func(*args, **kwargs)
+            if result is not None:
+                return result
+        return None
+
+    def call_reduce(
+        cls, method: str, function: typing.Callable, initial, *args, **kwargs
+    ):
+        """Calls a method of all enabled implementations and reduces their results.
+
+        .. code-block:: python
+
+            total = IFooInterface.call_reduce("count_items", operator.add, 0)
+
+        :param method: the name of the method to call
+        :param function: a function taking the accumulated value and the next result, like
+            in ``functools.reduce``
+        :param initial: the start value
+        """
+        result = initial
+        for func in _bound_methods(cls, method):
+            result = function(result, func(*args, **kwargs))
+        return result
+
+    def call_parallel(cls, method: str, *args, timeout: float = None, **kwargs) -> list:
+        """Calls a method of all enabled implementations concurrently, and returns a list of their results.
+
+        This is useful for I/O bound implementations, like notifying external systems: the call takes
+        as long as the slowest implementation, not the sum of all. The methods run in a thread pool
+        shared by all interfaces, its size can be set using the ``GDAPS["DISPATCH_MAX_WORKERS"]`` setting.
+
+        The results are in the same order as the implementations. If any implementation raises an
+        exception or does not finish in time, an :class:`~gdaps.exceptions.InterfaceCallError` is raised
+        after all others have finished. It contains all results and all errors.
+
+        A method that doesn't finish in time can't be stopped: it keeps running, and its thread
+        is not available for other calls until it returns.
+
+        If ``call_parallel()`` is called from within a method that runs in the pool, the methods
+        are called one after the other in the calling thread, as waiting for other threads of the
+        pool could block it forever. ``timeout`` is not respected then.
+
+        :param method: the name of the method to call
+        :param timeout: the maximum number of seconds to wait for all implementations. Waits
+            forever if ``None``.
+        """
+        methods = _bound_methods(cls, method)
+        if threading.current_thread().name.startswith("gdaps-dispatch"):
+            from gdaps.pluginmanager import _InlineExecutor
+
+            executor = _InlineExecutor()
+        else:
+            executor = _get_executor()
+        futures = [
+            executor.submit(_run_in_thread, func, args, kwargs) for func in methods
+        ]
+        _done, not_done = concurrent.futures.wait(futures, timeout=timeout)
+
+        results = []
+        errors = []
+        for func, future in zip(methods, futures):
+            if future in not_done:
+                future.cancel()
+                exception = concurrent.futures.TimeoutError(
+                    f"'{method}' did not finish within {timeout} seconds."
+                )
+            else:
+                exception = future.exception()
+            if exception is None:
+                results.append(future.result())
+            else:
+                results.append(None)
+                errors.append((_implementation_of(func), exception))
+
+        if errors:
+            raise InterfaceCallError(
+                f"{len(errors)} implementation(s) of {cls.__name__}.{method}() failed.",
+                results,
+                errors,
+            )
+        return results
+
+    async def acall(
+        cls,
+        method: str,
+        *args,
+        max_concurrency: int = None,
+        thread_sensitive: bool = False,
+        **kwargs,
+    ) -> list:
+        """Calls a method of all enabled implementations concurrently from async code, and returns
+        a list of their results.
+
+        ``async def`` methods are awaited directly, synchronous methods are wrapped using asgiref's
+        ``sync_to_async``, so they don't block the event loop. By default, synchronous methods run
+        concurrently, each in a thread of asgiref's thread pool. Methods that use Django's ORM or
+        other thread-bound resources should be called with ``thread_sensitive=True``: then they
+        run in the main thread, one after the other. Otherwise, database connections opened by
+        a method are cleaned up in its thread afterwards, like in ``call_parallel()``.
+
+        .. code-block:: python
+
+            async def my_view(request):
+                results = await IFooInterface.acall("notify", event)
+
+        The results are in the same order as the implementations. If any implementation raises an
+        exception, an :class:`~gdaps.exceptions.InterfaceCallError` is raised after all others have
+        finished.
+
+        :param method: the name of the method to call
+        :param max_concurrency: the maximum number of methods running at the same time.
+            Unlimited if ``None``.
+        :param thread_sensitive: passed to ``sync_to_async`` for synchronous methods.
+        """
+        methods = _awaitable_methods(cls, method, thread_sensitive)
+        if max_concurrency:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def limited(func):
+                async with semaphore:
+                    return await func(*args, **kwargs)
+
+            awaitables = [limited(func) for func in methods]
+        else:
+            awaitables = [func(*args, **kwargs) for func in methods]
+
+        results = await asyncio.gather(*awaitables, return_exceptions=True)
+
+        errors = [
+            (_implementation_of(func), result)
+            for func, result in zip(methods, results)
+            if isinstance(result, BaseException)
+        ]
+        if errors:
+            raise InterfaceCallError(
+                f"{len(errors)} implementation(s) of {cls.__name__}.{method}() failed.",
+                [None if isinstance(r, BaseException) else r for r in results],
+                errors,
+            )
+        return results
+
     def all_plugins(cls) -> Iterable:
         return iter(cls._implementations)
 
@@ -81,11 +304,7 @@ class InterfaceMeta(type):
 
     def __contains__(self, cls: type) -> bool:
         """Returns True if there is a plugin implementing this interface."""
-        # TODO: test
-        if getattr(self, "__service__", True):
-            return cls in [type(impl) for impl in self._implementations]
-        else:
-            return cls in self._implementations
+        return cls in self._implementation_classes
 
     def __repr__(self) -> str:
         """Returns a textual representation of the interface/implementation."""
@@ -96,6 +315,177 @@ class InterfaceMeta(type):
             return f"<Implementation '{self.__name__}' of {self.__class__}'>"
 
 
+class LazyService:
+    """Placeholder for an implementation of a lazy service interface.
+
+    It is registered instead of the service instance, and creates the instance on the first
+    attribute access. Iterating over the interface returns the real instances.
+    The instance is created only once, even if accessed by several threads at the same time.
+    """
+
+    __slots__ = ("_lazy_cls", "_lazy_obj", "_lazy_lock")
+
+    def __init__(self, cls: type) -> None:
+        object.__setattr__(self, "_lazy_cls", cls)
+        object.__setattr__(self, "_lazy_obj", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _lazy_get(self):
+        """Returns the service instance, and creates it if necessary."""
+        obj = self._lazy_obj
+        if obj is None:
+            with self._lazy_lock:
+                if self._lazy_obj is None:
+                    object.__setattr__(self, "_lazy_obj", self._lazy_cls())
+                obj = self._lazy_obj
+        return obj
+
+    @property
+    def __class__(self):
+        # let isinstance() checks pass without creating the instance
+        return self._lazy_cls
+
+    def __getattr__(self, name):
+        if name == "enabled":
+            # don't create the instance just to check whether it is enabled
+            return getattr(self._lazy_cls, "enabled", True)
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name, value) -> None:
+        setattr(self._lazy_get(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyService of {self._lazy_cls.__name__}>"
+
+
+def _owning_interface(cls: InterfaceMeta) -> InterfaceMeta:
+    """Returns the interface whose implementation list ``cls._implementations`` refers to."""
+    for klass in cls.__mro__:
+        if "_implementations" in klass.__dict__:
+            return klass
+
+
+def _update_enabled_implementations(interface: InterfaceMeta) -> None:
+    """Rebuilds the cached tuple of enabled implementations of an interface."""
+    enabled = tuple(
+        impl for impl in interface._implementations if getattr(impl, "enabled", True)
+    )
+    interface._enabled_implementations = enabled
+    interface._lazy_pending = any(type(impl) is LazyService for impl in enabled)
+    interface._bound_methods = {}
+    interface._async_methods = {}
+
+
+def _coroutine_methods(cls: InterfaceMeta) -> frozenset:
+    """Returns the names of all ``async def`` methods of an implementation class."""
+    names = {name for klass in cls.__mro__ for name in vars(klass)}
+    coroutine_methods = set()
+    for name in names:
+        value = inspect.getattr_static(cls, name)
+        if inspect.iscoroutinefunction(getattr(value, "__func__", value)):
+            coroutine_methods.add(name)
+    return frozenset(coroutine_methods)
+
+
+def _implementation_of(func: typing.Callable):
+    """Returns the implementation a (bound) method belongs to."""
+    # unwrap sync_to_async and _closing_connections wrappers
+    func = inspect.unwrap(getattr(func, "func", func))
+    return getattr(func, "__self__", func)
+
+
+def _closing_connections(func: typing.Callable) -> typing.Callable:
+    """Wraps a function that runs in a worker thread, see ``_run_in_thread()``."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _run_in_thread(func, args, kwargs)
+
+    return wrapper
+
+
+def _awaitable_methods(cls: InterfaceMeta, method: str, thread_sensitive: bool) -> tuple:
+    """Returns (cached) awaitable callables for the methods named ``method`` of all enabled
+    implementations."""
+    methods = cls._async_methods.get((method, thread_sensitive))
+    if methods is None:
+        from asgiref.sync import sync_to_async
+
+        methods = tuple(
+            func
+            if method in _implementation_class(impl)._coroutine_methods
+            else sync_to_async(func, thread_sensitive=True)
+            if thread_sensitive
+            else sync_to_async(_closing_connections(func), thread_sensitive=False)
+            for impl, func in zip(cls, _bound_methods(cls, method))
+        )
+        cls._async_methods[(method, thread_sensitive)] = methods
+    return methods
+
+
+def _implementation_class(impl) -> InterfaceMeta:
+    """Returns the class of an implementation, which may be a service instance or a class."""
+    return impl if isinstance(impl, InterfaceMeta) else type(impl)
+
+
+def _bound_methods(cls: InterfaceMeta, method: str) -> tuple:
+    """Returns the (cached) bound methods named ``method`` of all enabled implementations."""
+    methods = cls._bound_methods.get(method)
+    if methods is None:
+        methods = tuple(getattr(impl, method) for impl in cls)
+        cls._bound_methods[method] = methods
+    return methods
+
+
+def _instantiate_lazy_services(
+    interface: InterfaceMeta, predicate: typing.Callable[[LazyService], bool]
+) -> None:
+    """Replaces the lazy services of an interface that match ``predicate`` by their instances."""
+    implementations = interface._implementations
+    for index, impl in enumerate(implementations):
+        if type(impl) is LazyService and predicate(impl):
+            implementations[index] = impl._lazy_get()
+    _update_enabled_implementations(interface)
+
+
+def _enabled_flag_changed(cls: InterfaceMeta) -> None:
+    """Updates all interfaces affected by a changed ``enabled`` attribute of ``cls``.
+
+    Subclasses may inherit the flag, so their interfaces are updated as well."""
+    pending = [cls]
+    while pending:
+        klass = pending.pop()
+        for interface in klass.__dict__.get("_registered_in", ()):
+            _update_enabled_implementations(interface)
+        pending.extend(type.__subclasses__(klass))
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Returns the shared thread pool for parallel interface calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from gdaps.conf import gdaps_settings
+
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=gdaps_settings.DISPATCH_MAX_WORKERS,
+                    thread_name_prefix="gdaps-dispatch",
+                )
+    return _executor
+
+
+def _run_in_thread(func: typing.Callable, args: tuple, kwargs: dict):
+    """Runs a function in a worker thread, and cleans up database connections afterwards,
+    like Django does at the end of a request."""
+    from django.db import close_old_connections
+
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
 # noinspection PyPep8Naming
 def Interface(cls):
     """Decorator for classes that are interfaces.
@@ -67,20 +67,38 @@ class PluginMeta:
 
     #: A string containing one or more other plugins that this plugin is known being compatible with, e.g.
     #: "myproject.core>=1.0.0<2.0.0" - meaning: This plugin is compatible with ``myplugin.core`` from version
-    #: 1.0.0 to 1.x - v2.0 and above is incompatible.
+    #: 1.0.0 to 1.x - v2.0 and above is incompatible. Use a list of strings for more than one requirement.
+    #: Requirements are checked against installed distributions and the versions of other GDAPS plugins.
     #:
     #:         .. note:: Work In Progress.
     compatibility = "gdaps>=1.0.0"
 
-    def initialize(self):
+    #: The order of the plugin, relative to other plugins. Plugins with lower weights come first, e.g.
+    #: when their URLs are collected. Plugins with equal weights keep the order of INSTALLED_APPS.
+    weight = 0
+
+    #: A list of the names of other plugins this plugin depends on, e.g. ``["myproject.plugins.core"]``.
+    #: They come before this plugin in ``PluginManager.plugins()``, their submodules are loaded first, and their
+    #: ``initialize()`` methods are called before the one of this plugin.
+    dependencies = []
+
+    @staticmethod
+    def initialize():
         """
         Callback to initialize the plugin.
 
+        It is called on the ``PluginMeta`` class, not on an instance, so define it as a
+        ``staticmethod`` or ``classmethod``.
+
         If your plugin needs to install some data into the database at the first run, you can provide this
         method to ``PluginMeta``. It will be called when ``manage.py syncplugins`` is called and the plugin
         is run the first time.
 
         An example would be installing some fixtures, or providing a message to the user.
+
+        If the method takes a ``database`` argument, it is called with the alias of the database the
+        plugin was added to, once per database when ``syncplugins`` synchronizes several of them.
+        Without it, the method is called only once.
         """
 
 
@@ -98,17 +116,17 @@ class GdapsConfig(AppConfig):
     PluginMeta = GdapsPluginMeta
 
     def ready(self):
-        # walk through all installed plugins and check some things
-        for app in PluginManager.plugins():
-            if hasattr(app.PluginMeta, "compatibility"):
-                import pkg_resources
-
-                try:
-                    pkg_resources.require(app.PluginMeta.compatibility)
-                except pkg_resources.VersionConflict as e:
-                    logger.critical("Incompatible plugins found!")
-                    logger.critical(
-                        f"Plugin {app.name} requires you to have {e.req}, but you installed {e.dist}."
-                    )
-
-                    sys.exit(1)
+        from gdaps.profiling import profiler
+
+        # connect the signals that keep the plugin state up to date
+        import gdaps.state  # noqa: F401
+
+        # check the compatibility requirements of all installed plugins together
+        with profiler.record(self.name, "compatibility"):
+            errors = PluginManager.check_compatibility()
+        if errors:
+            logger.critical("Incompatible plugins found!")
+            for error in errors:
+                logger.critical(str(error))
+
+            sys.exit(1)
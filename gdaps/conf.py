@@ -4,6 +4,7 @@ GDAPS settings, checking for user settings first, then falling
 back to the defaults.
 """
 import os
+import weakref
 from importlib import import_module
 
 from django.conf import settings
@@ -13,7 +14,7 @@ from django.test.signals import setting_changed
 
 NAMESPACE = "GDAPS"
 
-DEFAULTS = {"ADMIN": True}
+DEFAULTS = {"ADMIN": True, "DISPATCH_MAX_WORKERS": 8, "PLUGIN_STATE_TIMEOUT": 10}
 
 # List of settings that may be in string import notation.
 IMPORT_STRINGS = []
@@ -51,6 +52,17 @@ def import_from_string(val, setting_name):
         raise ImportError(msg)
 
 
+def _as_set(names) -> frozenset:
+    """Returns a set of setting names, which may also be given as a single string."""
+    if isinstance(names, str):
+        return frozenset([names])
+    return frozenset(names)
+
+
+# all PluginSettings objects, by namespace, see PluginSettings.reload()
+_registry = {}
+
+
 class PluginSettings:
     """
     A settings object, that allows app specific settings to be accessed as properties.
@@ -64,28 +76,38 @@ class PluginSettings:
 
     Any setting with string import paths will be automatically resolved
     and return the class, rather than the string literal.
+
+    All settings are resolved together when the first one is accessed.
+    ``import_strings`` and ``removed_settings`` may be lists of names, or a single name.
+
+    When the Django setting of the namespace changes, e.g. by ``override_settings()`` in tests,
+    the resolved settings of all PluginSettings objects of this namespace are reset, see
+    ``reload()``.
     """
 
     def __init__(
         self,
         namespace: str = None,
-        user_settings: list = None,
+        user_settings: dict = None,
         defaults: dict = None,
         import_strings=None,
         removed_settings=None,
     ):
 
+        # user settings given here are kept on reload, others are read from Django's settings
+        self._given_user_settings = user_settings or None
         if user_settings:
             self._user_settings = user_settings
         self.defaults = defaults or DEFAULTS
-        self.import_strings = import_strings or IMPORT_STRINGS
-        self.removed_settings = removed_settings or REMOVED_SETTINGS
+        self.import_strings = _as_set(import_strings or IMPORT_STRINGS)
+        self.removed_settings = _as_set(removed_settings or REMOVED_SETTINGS)
 
+        namespace = namespace or NAMESPACE
         if not namespace == namespace.upper():
             raise RuntimeError("Django settings must be UPPERCASE.")
-        self._namespace = namespace or NAMESPACE
+        self._namespace = namespace
 
-        setting_changed.connect(self.reload)
+        _registry.setdefault(namespace, weakref.WeakSet()).add(self)
 
     @property
     def user_settings(self):
@@ -93,7 +115,46 @@ class PluginSettings:
             self._user_settings = getattr(settings, self._namespace, {})
         return self._user_settings
 
+    def _compile(self) -> None:
+        """Resolves all settings at once and stores them as attributes of this object.
+
+        After that, reading a setting is a plain attribute access that doesn't call
+        ``__getattr__`` any more. Nothing is stored if an import string can't be imported.
+
+        :raises RuntimeError: if the user settings contain a removed key, or a key that none of
+            the PluginSettings objects of this namespace has a default for.
+        """
+        user_settings = self.user_settings
+        self._check_user_settings(user_settings)
+        values = {
+            key: user_settings[key] if key in user_settings else default
+            for key, default in self.defaults.items()
+        }
+        # Coerce import strings into classes
+        for key in self.import_strings & values.keys():
+            values[key] = perform_import(values[key], key)
+        self.__dict__.update(values)
+
+    def _check_user_settings(self, user_settings: dict) -> None:
+        # several PluginSettings objects may share a namespace, e.g. gdaps and gdaps.frontend
+        siblings = list(_registry.get(self._namespace, ())) or [self]
+        removed = set().union(*(sibling.removed_settings for sibling in siblings))
+        allowed = set().union(*(sibling.defaults.keys() for sibling in siblings))
+        for key in user_settings:
+            if key in removed:
+                raise RuntimeError(
+                    f"The '{key}' setting has been removed from '{self._namespace}'. Please "
+                    f"remove it from your settings."
+                )
+            if key not in allowed:
+                raise RuntimeError(
+                    f"Invalid plugin setting: '{self._namespace}' doesn't allow key '{key}'."
+                )
+
     def __getattr__(self, attr):
+        # only called for attributes that are not resolved yet
+        if attr.startswith("_"):
+            raise AttributeError(attr)
         if attr in self.removed_settings:
             raise AttributeError(
                 f"Invalid plugin settings attribute: '{self._namespace}' has invalid (removed) key '{attr}'."
@@ -103,27 +164,23 @@ class PluginSettings:
                 f"Invalid plugin settings attribute: '{self._namespace}' doesn't allow key '{attr}'"
             )
 
-        try:
-            # Check if present in user settings
-            val = self.user_settings[attr]
-        except KeyError:
-            # Fall back to defaults
-            val = self.defaults[attr]
+        self._compile()
+        return self.__dict__[attr]
 
-        # Coerce import strings into classes
-        if attr in self.import_strings:
-            val = perform_import(val, attr)
-
-        setattr(self, attr, val)
-        return val
-
-    @staticmethod
-    def reload(*args, **kwargs):
-        # FIXME: this does not work for inherited pluginsettings of other modules...! it's hardcoded "gdaps_settings".
-        global gdaps_settings
-        setting, value = kwargs["setting"], kwargs["value"]
-        if setting == NAMESPACE:
-            gdaps_settings = PluginSettings(NAMESPACE, value, DEFAULTS, IMPORT_STRINGS)
+    def reload(self) -> None:
+        """Resets the resolved settings, they are resolved again at the next access."""
+        for key in self.defaults:
+            self.__dict__.pop(key, None)
+        if self._given_user_settings is None:
+            self.__dict__.pop("_user_settings", None)
+
+
+def _reload_settings(*args, setting, **kwargs):
+    for plugin_settings in list(_registry.get(setting, ())):
+        plugin_settings.reload()
+
+
+setting_changed.connect(_reload_settings)
 
 
 gdaps_settings = PluginSettings(NAMESPACE, None, DEFAULTS, IMPORT_STRINGS)
@@ -1,4 +1,4 @@
-__all__ = ["PluginError", "IncompatibleVersionsError"]
+__all__ = ["PluginError", "IncompatibleVersionsError", "InterfaceCallError"]
 
 
 class PluginError(Exception):
@@ -6,4 +6,27 @@ class PluginError(Exception):
 
 
 class IncompatibleVersionsError(PluginError):
-    """Exception that occurs when plugins that are not compatible are installed together."""
+    """Exception that occurs when plugins that are not compatible are installed together.
+
+    :ivar req: the requirement that is not satisfied
+    :ivar installed: the installed distribution and version, or ``None`` if it is missing
+    """
+
+    def __init__(self, message="", req=None, installed=None):
+        super().__init__(message)
+        self.req = req
+        self.installed = installed
+
+
+class InterfaceCallError(PluginError):
+    """Exception that occurs when implementations fail during a parallel call of an interface method.
+
+    :ivar results: the results of all implementations, in the order of the implementations.
+        Failed implementations have ``None`` as result.
+    :ivar errors: a list of ``(implementation, exception)`` tuples of the failed implementations.
+    """
+
+    def __init__(self, message, results: list, errors: list):
+        super().__init__(message)
+        self.results = results
+        self.errors = errors
@@ -8,10 +8,9 @@ from django.db import connections, DEFAULT_DB_ALIAS
 from django.db.migrations.executor import MigrationExecutor
 from django.utils.translation import gettext_lazy as _
 
-from gdaps import PluginError
 from gdaps.exceptions import IncompatibleVersionsError
 from gdaps.models import GdapsPlugin
-from gdaps.pluginmanager import PluginManager
+from gdaps.pluginmanager import PluginManager, _compatibility_requirements
 from semantic_version import Version
 
 logger = logging.getLogger(__name__)
@@ -34,6 +33,21 @@ class Command(BaseCommand):
     # def add_arguments(self, parser):
     #     parser.add_argument("plugin_name", help=self.help, type=str)
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pool",
+            choices=["thread", "process"],
+            default="thread",
+            help="call the initialize() methods in threads or processes (default: thread)",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=1,
+            help="the maximum number of initialize() methods called at the same time. Plugins must "
+            "declare their dependencies to use more than 1 (default: 1)",
+        )
+
     # __db_synchronized = None
     #
     # def is_database_synchronized(self, database):
@@ -50,6 +64,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """calls all plugins' `initialize` methods"""
 
+        new_apps = []
         for app in PluginManager.plugins():
             # first, try to fetch this plugin from the DB - if doesn't exist, create and initialize it.
             # if it exists, check if there is an update available.
@@ -101,16 +116,11 @@ class Command(BaseCommand):
                     )
 
                 # TODO: add compatibility check
-                plugin.compatibility = getattr(meta, "compatibility", "")
+                plugin.compatibility = ", ".join(_compatibility_requirements(meta))
 
                 plugin.save()
+                new_apps.append(app)
 
-                if hasattr(app, "initialize"):
-                    try:
-                        app.initialize()
-                    except Exception as E:
-                        raise PluginError(
-                            "Error calling initialize method of '{}' plugin".format(
-                                app.name
-                            )
-                        )
+        PluginManager.initialize_plugins(
+            new_apps, pool=options["pool"], max_workers=options["max_workers"]
+        )
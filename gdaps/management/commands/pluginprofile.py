@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# executed in a fresh interpreter, so that all plugins are loaded from scratch
+PROFILE_SCRIPT = """
+import json, sys
+from gdaps.profiling import profile_plugins
+profile_plugins(**json.loads(sys.argv[1]))
+"""
+
+SORT_KEYS = {
+    "time": lambda record: record["time"],
+    "memory": lambda record: record["memory"] or 0,
+    "modules": lambda record: len(record["modules"]),
+}
+
+
+class Command(BaseCommand):
+    """This is the management command to find out which plugins slow down the start of Django."""
+
+    help = (
+        "Loads all plugins in a new Python process and shows how long each plugin and submodule "
+        "takes to import, how much memory it allocates and how many modules it imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "submodules",
+            nargs="*",
+            help="plugin submodules to load too, e.g. 'urls' or 'schema'",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=sorted(SORT_KEYS),
+            default="time",
+            help="sort the table by this column (default: time)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="output the results as JSON"
+        )
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="don't trace memory allocations, which slows down imports",
+        )
+
+    def handle(self, *args, **options) -> None:
+        records = self.run_profile(options["submodules"], not options["no_memory"])
+        records.sort(key=SORT_KEYS[options["sort"]], reverse=True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(records, indent=2))
+            return
+
+        rows = [
+            (
+                record["plugin"],
+                record["step"],
+                f"{record['time'] * 1000:.1f}",
+                str(int(record["memory"] / 1024))
+                if record["memory"] is not None
+                else "-",
+                str(len(record["modules"])),
+            )
+            for record in records
+        ]
+        header = ("Plugin", "Step", "Time (ms)", "Memory (KiB)", "Modules")
+        widths = [max(len(row[i]) for row in rows + [header]) for i in range(5)]
+        for row in [header] + rows:
+            self.stdout.write(
+                "  ".join(
+                    value.ljust(width) if i < 2 else value.rjust(width)
+                    for i, (value, width) in enumerate(zip(row, widths))
+                )
+            )
+        total = sum(record["time"] for record in records)
+        self.stdout.write(f"\nTotal: {total * 1000:.1f} ms")
+
+    @staticmethod
+    def run_profile(submodules, trace_memory: bool) -> list:
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, "profile.json")
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+                "PYTHONPATH": os.pathsep.join(path for path in sys.path if path),
+            }
+            arguments = json.dumps(
+                {
+                    "submodules": submodules,
+                    "output_file": output_file,
+                    "trace_memory": trace_memory,
+                }
+            )
+            process = subprocess.run(
+                [sys.executable, "-c", PROFILE_SCRIPT, arguments],
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+            )
+            if process.returncode:
+                raise CommandError(f"Profiling plugins failed:\n{process.stderr}")
+            with open(output_file) as f:
+                return json.load(f)
@@ -0,0 +1,22 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from gdaps.pluginmanager import PluginManager
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """This is the management command to rebuild the cache of plugins found via entry points."""
+
+    help = "Searches all entry points for plugins again and rebuilds the plugin cache file."
+
+    def handle(self, *args, **options) -> None:
+        logger.info(" ⌛ Searching for plugins...")
+        plugins = PluginManager.rebuild_plugin_cache()
+        for plugin in plugins:
+            logger.info(f"   ➤ {plugin}")
+        logger.info(
+            f" ✔ Saved {len(plugins)} plugin(s) to '{PluginManager.cache_file}'."
+        )
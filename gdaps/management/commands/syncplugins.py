@@ -1,21 +1,74 @@
+import concurrent.futures
+import hashlib
+import importlib.util
+import json
 import logging
+import os
 import sys
+import threading
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist, ImproperlyConfigured
-from django.core.management.base import BaseCommand, no_translations
-from django.db import connections
-from django.db.migrations.executor import MigrationExecutor
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError, no_translations
+from django.db import connections, router, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils.functional import Promise
 from django.utils.translation import gettext_lazy as _
 
 from gdaps.exceptions import PluginError
 from gdaps.models import GdapsPlugin
-from gdaps.pluginmanager import PluginManager
+from gdaps.pluginmanager import (
+    PluginManager,
+    _compatibility_requirements,
+    _read_plugin_cache,
+    _write_plugin_cache,
+)
+from gdaps.state import plugin_state
 from semantic_version import Version
 
 logger = logging.getLogger(__name__)
 
+#: The key of the hashes of synchronized migration states in Django's cache, per database alias.
+#: Only used if no plugin cache file is configured.
+MIGRATION_STATE_CACHE_KEY = "gdaps:migration-state:{}"
+
+
+def _migration_files() -> List[Tuple[str, str, int, int]]:
+    """Returns name, modification time and size of all migration files, without importing them."""
+    files = []
+    for app_config in apps.get_app_configs():
+        module_name, _explicit = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError):
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for location in spec.submodule_search_locations:
+            with os.scandir(location) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".py"):
+                        stat = entry.stat()
+                        files.append(
+                            (module_name, entry.name, stat.st_mtime_ns, stat.st_size)
+                        )
+    return sorted(files)
+
+
+def _migration_state_hash(applied: Set[Tuple[str, str]]) -> str:
+    """Returns a hash of the migration files on disk and the migrations applied to a database."""
+    data = json.dumps([_migration_files(), sorted(applied)])
+    return hashlib.sha256(data.encode()).hexdigest()
+
 
 class Command(BaseCommand):
     """This is the management command to sync all installed plugins into the database."""
@@ -23,7 +76,18 @@ class Command(BaseCommand):
     help = "Synchronizes all plugins into the database."
     verbosity = 0
 
-    __db_synchronized = False
+    trust_migration_state = False
+    initialize_pool = "thread"
+    # see PluginManager.initialize_plugins()
+    initialize_per_database = None
+    initialize_workers = 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # database alias -> cached flag if db is in sync
+        self.__db_synchronized = {}
+        self.__loader = None
+        self.__loader_lock = threading.Lock()
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -32,57 +96,293 @@ class Command(BaseCommand):
             type=str,
             help="synchronizes only plugins from specific database",
         )
+        parser.add_argument(
+            "--databases",
+            nargs="+",
+            type=str,
+            help="synchronizes plugins into the given databases concurrently",
+        )
+        parser.add_argument(
+            "--all-databases",
+            action="store_true",
+            help="synchronizes plugins into all databases concurrently",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            default=4,
+            help="the maximum number of databases that are synchronized at the same time (default: 4)",
+        )
+        parser.add_argument(
+            "--trust-migration-state",
+            action="store_true",
+            help="don't load the migration graph for databases whose migration state didn't change "
+            "since they were found synchronized the last time",
+        )
+        parser.add_argument(
+            "--initialize-pool",
+            choices=["thread", "process"],
+            default="thread",
+            help="call the initialize() methods of new plugins in threads or processes (default: thread)",
+        )
+        parser.add_argument(
+            "--initialize-workers",
+            type=int,
+            default=1,
+            help="the maximum number of initialize() methods called at the same time. Plugins must "
+            "declare their dependencies to use more than 1 (default: 1)",
+        )
+
+    def is_database_synchronized(self, database=None) -> bool:
+        """Returns True if all migrations are applied to the database.
 
-    def is_database_synchronized(self, database=None):
-        # cached flag if db is in sync, taken from migrate mgmt cmd
+        The result is cached per database. The migration graph is loaded from disk only once,
+        and is shared by all databases. With ``--trust-migration-state``, a database is considered
+        synchronized without loading the graph at all, if its applied migrations and the migration
+        files are the same as when it was found synchronized the last time.
+        """
         if not database:
             database = "default"
-        if not self.__db_synchronized:
-            connection = connections[database]
-            connection.prepare_database()
-            executor = MigrationExecutor(connection)
-            targets = executor.loader.graph.leaf_nodes()
-            self.__db_synchronized = False if executor.migration_plan(targets) else True
+        if database not in self.__db_synchronized:
+            self.__db_synchronized[database] = self._check_migrations(database)
+
+        return self.__db_synchronized[database]
+
+    def _migration_loader(self) -> MigrationLoader:
+        with self.__loader_lock:
+            if self.__loader is None:
+                # without a connection, only the graph is built, applied migrations are not read
+                self.__loader = MigrationLoader(None, ignore_no_migrations=True)
+            return self.__loader
+
+    def _check_migrations(self, database: str) -> bool:
+        connection = connections[database]
+        connection.prepare_database()
+        applied = set(MigrationRecorder(connection).applied_migrations())
+
+        state_hash = None
+        if self.trust_migration_state:
+            state_hash = _migration_state_hash(applied)
+            if self._recorded_migration_state(database) == state_hash:
+                return True
+
+        loader = self._migration_loader()
+        # squashed migrations count as applied if all the migrations they replace are applied
+        for key, migration in loader.replacements.items():
+            if all(replaced in applied for replaced in migration.replaces):
+                applied.add(key)
+        synchronized = set(loader.graph.nodes) <= applied
 
-        return self.__db_synchronized
+        if synchronized and state_hash:
+            self._record_migration_state(database, state_hash)
+        return synchronized
 
     @staticmethod
-    def _copy_plugin_to_db(app: AppConfig, db_plugin: GdapsPlugin) -> None:
+    def _recorded_migration_state(database: str) -> Optional[str]:
+        """Returns the hash of the migration state the database was found synchronized with.
+
+        It is read from the plugin cache file if there is one, else from Django's cache.
+        """
+        if PluginManager.cache_file:
+            cache_data = _read_plugin_cache(PluginManager.cache_file)
+            return cache_data.get("migration_states", {}).get(database)
+        return cache.get(MIGRATION_STATE_CACHE_KEY.format(database))
+
+    def _record_migration_state(self, database: str, state_hash: str) -> None:
+        if PluginManager.cache_file:
+            # databases may be checked in parallel threads
+            with self.__loader_lock:
+                cache_data = _read_plugin_cache(PluginManager.cache_file)
+                if cache_data:
+                    cache_data.setdefault("migration_states", {})[database] = state_hash
+                    _write_plugin_cache(PluginManager.cache_file, cache_data)
+        else:
+            cache.set(MIGRATION_STATE_CACHE_KEY.format(database), state_hash, None)
+
+    @staticmethod
+    def _plugin_metadata(app: AppConfig) -> Dict[str, Any]:
+        """Returns the values of the GdapsPlugin fields that are taken from the plugin's PluginMeta."""
         meta = app.PluginMeta
-        db_plugin.name = app.name
-        db_plugin.verbose_name = getattr(
-            meta, "verbose_name", app.name.replace("_", " ").capitalize()
-        )
-        db_plugin.author = getattr(meta, "author", _("unknown"))
-        db_plugin.author_email = getattr(meta, "author_email", "")
-        db_plugin.vendor = getattr(meta, "vendor", "")
-        db_plugin.category = getattr(meta, "category", _("Miscellaneous"))
-        db_plugin.description = getattr(meta, "description", "")
-        db_plugin.hidden = getattr(meta, "hidden", False)
-        db_plugin.version = app.PluginMeta.version
-        db_plugin.compatibility = getattr(meta, "compatibility", "")
+        values = {
+            "name": app.name,
+            "verbose_name": getattr(
+                meta, "verbose_name", app.name.replace("_", " ").capitalize()
+            ),
+            "author": getattr(meta, "author", _("unknown")),
+            "author_email": getattr(meta, "author_email", ""),
+            "vendor": getattr(meta, "vendor", ""),
+            "category": getattr(meta, "category", _("Miscellaneous")),
+            "description": getattr(meta, "description", ""),
+            "version": app.PluginMeta.version,
+            "compatibility": ", ".join(_compatibility_requirements(meta)),
+        }
+        return {
+            field: str(value) if isinstance(value, Promise) else value
+            for field, value in values.items()
+        }
+
+    @classmethod
+    def _copy_plugin_to_db(cls, app: AppConfig, db_plugin: GdapsPlugin) -> Set[str]:
+        """Copies the plugin's metadata to the model instance, without saving it.
 
-        db_plugin.save()
+        If the hash of the metadata is the same as the one stored in the model, nothing is copied.
+
+        :returns: the names of the fields that were changed.
+        """
+        values = cls._plugin_metadata(app)
+        meta_hash = hashlib.sha256(
+            json.dumps(values, sort_keys=True).encode()
+        ).hexdigest()
+        db_plugin.hidden = getattr(app.PluginMeta, "hidden", False)
+        if db_plugin.meta_hash == meta_hash:
+            return set()
+
+        changed = {"meta_hash"}
+        db_plugin.meta_hash = meta_hash
+        for field, value in values.items():
+            if getattr(db_plugin, field) != value:
+                setattr(db_plugin, field, value)
+                changed.add(field)
+        return changed
 
     def handle(self, *args, **options) -> None:
         """Synchronizes all found plugins into the database.
 
         Only plugins that are activated vie INSTALLED_APPS or installed via pip/pipenv and found by the
         PluginManager are taken into account.
+
+        With ``--databases`` or ``--all-databases``, the databases are synchronized concurrently in
+        a thread pool, each with its own connection. A failing database doesn't stop the others,
+        the command fails after all databases were processed. ``initialize()`` methods without a
+        ``database`` argument are called once afterwards, in a transaction of the database the
+        routers choose for ``GdapsPlugin``, or of another synchronized one if that failed.
         """
         self.verbosity = options["verbosity"]
-        if not options["database"]:
-            options["database"] = "default"
+        self.trust_migration_state = options["trust_migration_state"]
+        if (
+            self.trust_migration_state
+            and not PluginManager.cache_file
+            and isinstance(caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache))
+        ):
+            logger.warning(
+                "--trust-migration-state needs a plugin cache file, or a cache backend that is "
+                "shared between processes, like memcached, redis or the database cache."
+            )
+        self.initialize_pool = options["initialize_pool"]
+        self.initialize_workers = options["initialize_workers"]
+        self.initialize_per_database = None
+        if options["all_databases"]:
+            databases = list(settings.DATABASES)
+        elif options["databases"]:
+            databases = list(dict.fromkeys(options["databases"]))
+        else:
+            databases = [options["database"] or "default"]
+
+        if len(databases) == 1:
+            # run in this thread, so that an open transaction (e.g. in tests) is used
+            results = {databases[0]: self.sync_database(databases[0])}
+        else:
+            # initialize() methods without a database argument are called once afterwards
+            self.initialize_per_database = True
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(options["max_workers"], len(databases))),
+                thread_name_prefix="syncplugins",
+            ) as executor:
+                futures = {
+                    database: executor.submit(self._sync_database_in_thread, database)
+                    for database in databases
+                }
+            results = {database: future.result() for database, future in futures.items()}
+
+        initialize_error = None
+        if len(databases) > 1:
+            synced = [
+                database
+                for database, result in results.items()
+                if not isinstance(result, Exception)
+            ]
+            created = set()
+            for database in synced:
+                created.update(results[database]["new_plugins"])
+            if created:
+                # the transaction is opened in the database the routers choose for plugins, or
+                # in one that was synchronized, if that one failed
+                database = router.db_for_write(GdapsPlugin)
+                if database not in synced:
+                    database = synced[0]
+                try:
+                    PluginManager.initialize_plugins(
+                        [app for app in PluginManager.plugins() if app.name in created],
+                        database=database,
+                        pool=self.initialize_pool,
+                        max_workers=self.initialize_workers,
+                        per_database=False,
+                    )
+                except PluginError as e:
+                    initialize_error = e
+
+        failed = []
+        for database, result in results.items():
+            prefix = f"{database}: " if len(databases) > 1 else ""
+            if isinstance(result, Exception):
+                failed.append(database)
+                self.stderr.write(f"{prefix}{result.__class__.__name__}: {result}")
+            elif self.verbosity > 0:
+                self.stdout.write(
+                    f"{prefix}{result['created']} created, {result['updated']} updated, "
+                    f"{result['unchanged']} unchanged, {result['orphaned']} orphaned."
+                )
+
+        if initialize_error is not None:
+            self.stderr.write(f"{initialize_error.__class__.__name__}: {initialize_error}")
+
+        errors = []
+        if failed:
+            errors.append(f"Synchronizing plugins failed for database(s): {', '.join(failed)}")
+        if initialize_error is not None:
+            errors.append("Initializing plugins failed")
+        if errors:
+            raise CommandError(". ".join(errors))
 
+    def _sync_database_in_thread(self, database: str):
+        """Synchronizes the plugins into a database, and returns the counts or the exception."""
+        try:
+            return self.sync_database(database)
+        except Exception as e:
+            logger.exception(f"Synchronizing plugins into database '{database}' failed.")
+            return e
+        finally:
+            # each thread has its own connections, close them before the thread ends
+            connections.close_all()
+
+    def sync_database(self, database: str) -> Dict[str, Any]:
+        """Synchronizes all found plugins into one database.
+
+        All plugins are loaded from the database with one query, and written back with one
+        ``bulk_create`` and one ``bulk_update`` per set of changed fields, in one transaction.
+
+        New plugins are initialized afterwards, see ``PluginManager.initialize_plugins()``.
+
+        :returns: the numbers of "created", "updated", "unchanged" and "orphaned" plugins, and the
+            names of the created plugins as "new_plugins".
+        """
         logger.info(" ⌛ Searching for plugins...")
+        db_plugins = {}
+        # noinspection PyUnresolvedReferences
+        for db_plugin in GdapsPlugin.objects.using(database).order_by("-pk"):
+            # if a name is in the database more than once, the first one is used.
+            db_plugins[db_plugin.name] = db_plugin
+
+        new_plugins = []
+        # changed field names -> plugins
+        changed_plugins = defaultdict(list)
+        unchanged = 0
         for app in PluginManager.plugins():
-            # first, try to fetch this plugin from the DB - if doesn't exist, create and initialize it.
+            # first, try to find this plugin in the DB - if doesn't exist, create and initialize it.
             # if it exists, check if there is an update available.
             logger.info(f"   ➤ {app.name}")
-            try:
-                # noinspection PyUnresolvedReferences
-                db_plugin = GdapsPlugin.objects.get(name=app.name)
-
+            db_plugin = db_plugins.pop(app.name, None)
+            if db_plugin is not None:
                 file_version = app.PluginMeta.version
                 if Version(file_version) > Version(db_plugin.version):
                     # there is a newer version available on disk
@@ -93,24 +393,27 @@ class Command(BaseCommand):
                         f"There is a newer version of the '{app.verbose_name}' plugin available."
                     )
 
-                    for database in settings.DATABASES.keys():
-                        if not self.is_database_synchronized(database):
-                            raise PluginError(
-                                "Plugin version upgrade detected. Please run the 'migrate' management "
-                                "command first to update plugins."
-                            )
+                    if not self.is_database_synchronized(database):
+                        raise PluginError(
+                            "Plugin version upgrade detected. Please run the 'migrate' management "
+                            "command first to update plugins."
+                        )
 
                 # at this point, the db is in sync with the files according to Django.
                 # we can now update all db fields with that from the plugin on disk
                 # this is necessary as the author e.g. could change during plugin development
 
                 # Copy metadata to DB in any case, as other thincs as version could have changed too.
-                self._copy_plugin_to_db(app, db_plugin)
+                changed = self._copy_plugin_to_db(app, db_plugin)
+                if changed:
+                    changed_plugins[frozenset(changed)].append(db_plugin)
+                else:
+                    unchanged += 1
 
                 # we can now check if there is code waiting to execute.
                 # TODO: run upgrade procedure of plugin
 
-            except ObjectDoesNotExist:
+            else:
                 # if it doesn't exist, it is a new plugin.
                 # Let's initialize it.
                 logger.info(f" ✔ Found new plugin '{app.verbose_name}'.")
@@ -125,23 +428,63 @@ class Command(BaseCommand):
                         f"Plugin '{app.name}' version number is incorrect: '{version}'"
                     )
                 self._copy_plugin_to_db(app, db_plugin)
+                new_plugins.append((app, db_plugin))
 
                 # TODO: add compatibility check
 
-                if hasattr(app.PluginMeta, "initialize"):
-                    try:
-                        app.PluginMeta.initialize()
-                    except Exception as E:
-                        raise PluginError(
-                            f"Error calling initialize() method of '{app.name}' plugin"
-                        )
-
         # are there plugins in the database that do not exist on disk?
         logger.info(" ⌛ Searching for orphaned plugins in database...")
-
-        for plugin in PluginManager.orphaned_plugins():  # type: GdapsPlugin
-            if self.is_database_synchronized(options["database"] or None):
-                plugin.delete()
-                logger.info(f"   ➤ {plugin.name} removed from database.")
-            else:
+        orphaned_plugins = sorted(db_plugins.values(), key=lambda plugin: plugin.pk)
+        orphaned = len(orphaned_plugins)
+        if orphaned_plugins and not self.is_database_synchronized(database):
+            for plugin in orphaned_plugins:
                 logger.info(f"   ➤ {plugin.name}")
+            orphaned_plugins = []
+
+        if new_plugins or changed_plugins or orphaned_plugins:
+            self._write_changes(database, new_plugins, changed_plugins, orphaned_plugins)
+
+        PluginManager.initialize_plugins(
+            [app for app, db_plugin in new_plugins],
+            database=database,
+            pool=self.initialize_pool,
+            max_workers=self.initialize_workers,
+            per_database=self.initialize_per_database,
+        )
+
+        return {
+            "new_plugins": [app.name for app, db_plugin in new_plugins],
+            "created": len(new_plugins),
+            "updated": sum(len(plugins) for plugins in changed_plugins.values()),
+            "unchanged": unchanged,
+            "orphaned": orphaned,
+        }
+
+    @staticmethod
+    def _write_changes(
+        database: str,
+        new_plugins: List[Tuple[AppConfig, GdapsPlugin]],
+        changed_plugins: Dict[FrozenSet[str], List[GdapsPlugin]],
+        orphaned_plugins: List[GdapsPlugin],
+    ) -> None:
+        """Saves new and changed plugins, and removes orphaned ones, in one transaction."""
+        with transaction.atomic(using=database):
+            # noinspection PyUnresolvedReferences
+            GdapsPlugin.objects.using(database).bulk_create(
+                [db_plugin for app, db_plugin in new_plugins]
+            )
+            for fields, plugins in changed_plugins.items():
+                # noinspection PyUnresolvedReferences
+                GdapsPlugin.objects.using(database).bulk_update(
+                    plugins, sorted(fields)
+                )
+            if orphaned_plugins:
+                # noinspection PyUnresolvedReferences
+                GdapsPlugin.objects.using(database).filter(
+                    pk__in=[plugin.pk for plugin in orphaned_plugins]
+                ).delete()
+                for plugin in orphaned_plugins:
+                    logger.info(f"   ➤ {plugin.name} removed from database.")
+
+            # once for all rows, bulk operations don't send signals
+            transaction.on_commit(plugin_state.invalidate, using=database)
@@ -0,0 +1,154 @@
+"""
+This module provides access to the metadata of installed distributions: entry points and versions.
+
+It uses ``importlib.metadata`` and ``packaging``, which are both imported only when needed. They are
+much faster to import than ``pkg_resources``, which scans all installed distributions at import time.
+"""
+import functools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from gdaps.exceptions import IncompatibleVersionsError
+
+__all__ = [
+    "entry_point_modules",
+    "require",
+    "find_incompatibilities",
+]
+
+
+def _importlib_metadata():
+    try:
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        # Python < 3.8
+        import importlib_metadata
+    return importlib_metadata
+
+
+def entry_point_modules(group: str) -> List[str]:
+    """Returns the dotted names of all objects that are registered as entry points in a group.
+
+    An entry point ``foo = myproject.plugins.foo`` results in ``"myproject.plugins.foo"``,
+    ``foo = myproject.plugins.foo:apps.FooConfig`` in ``"myproject.plugins.foo.apps.FooConfig"``.
+
+    :param group: the entry points group
+    """
+    importlib_metadata = _importlib_metadata()
+    try:
+        entry_points = importlib_metadata.entry_points(group=group)
+    except TypeError:
+        # Python < 3.10
+        entry_points = importlib_metadata.entry_points().get(group, [])
+
+    names = []
+    for entry_point in entry_points:
+        # "module.name:attr.path [extras]"
+        module, _sep, attrs = entry_point.value.partition(":")
+        name = module.strip()
+        attrs = attrs.split("[")[0].strip()
+        if attrs:
+            name += "." + attrs
+        # the same distribution may be found more than once on sys.path
+        if name not in names:
+            names.append(name)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_requirement(requirement: str):
+    from packaging.requirements import Requirement
+
+    return Requirement(requirement)
+
+
+def _canonical_name(name: str) -> str:
+    from packaging.utils import canonicalize_name
+
+    return canonicalize_name(name)
+
+
+def _check(req, version: Optional[str]) -> Optional[IncompatibleVersionsError]:
+    """Returns an error if ``version`` of the required distribution doesn't satisfy ``req``."""
+    from packaging.version import InvalidVersion
+
+    if version is None:
+        return IncompatibleVersionsError(
+            f"'{req.name}' is required, but not installed.", req=req, installed=None
+        )
+    try:
+        satisfied = req.specifier.contains(version, prereleases=True)
+    except InvalidVersion:
+        satisfied = False
+    if not satisfied:
+        return IncompatibleVersionsError(
+            f"'{req}' is required, but version {version} is installed.",
+            req=req,
+            installed=f"{req.name} {version}",
+        )
+    return None
+
+
+def _installed_version(name: str) -> Optional[str]:
+    """Returns the version of an installed distribution, or None if it is not installed.
+
+    Only the metadata of this distribution is read.
+    """
+    importlib_metadata = _importlib_metadata()
+    try:
+        return importlib_metadata.version(name)
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+def find_incompatibilities(
+    requirements: Iterable[Tuple[str, str]], plugin_versions: Dict[str, str] = None
+) -> List[IncompatibleVersionsError]:
+    """Checks many requirements at once, see ``require()``.
+
+    Only the distributions named in the requirements are looked up.
+
+    :param requirements: ``(requirer, requirement)`` tuples, e.g. ``("myproject.plugins.foo",
+        "myproject.core>=2.3.0")``. The requirer is only used in error messages.
+    :param plugin_versions: versions of GDAPS plugins keyed by their app names, see ``require()``.
+    :returns: an error for each requirement that is not satisfied, in the order of
+        ``requirements``. An empty list means everything is compatible.
+    """
+    plugin_versions = {
+        _canonical_name(name): version for name, version in (plugin_versions or {}).items()
+    }
+    errors = []
+    for requirer, requirement in requirements:
+        try:
+            require(requirement, plugin_versions)
+        except IncompatibleVersionsError as error:
+            error.args = (f"{requirer}: {error}",)
+            errors.append(error)
+    return errors
+
+
+def require(requirement: str, plugin_versions: Dict[str, str] = None) -> None:
+    """Checks if an installed distribution satisfies a requirement, e.g. ``"gdaps>=0.4.0"``.
+
+    In contrary to ``pkg_resources.require()``, only the given distribution is checked, not
+    its dependencies, and only its metadata is read. Requirement strings are parsed only once
+    per process.
+
+    :param requirement: a PEP 508 requirement string
+    :param plugin_versions: versions of GDAPS plugins, which are not distributions themselves,
+        keyed by canonical names (e.g. "myproject-plugins-foo"). Installed distributions with the
+        same name take precedence.
+    :raises IncompatibleVersionsError: if the distribution is not installed, or if its version does not
+        match the requirement.
+    """
+    req = _parse_requirement(requirement)
+    if req.marker is not None and not req.marker.evaluate():
+        return
+
+    name = _canonical_name(req.name)
+    version = _installed_version(name)
+    if version is None and plugin_versions:
+        version = plugin_versions.get(name)
+
+    error = _check(req, version)
+    if error is not None:
+        raise error
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("gdaps", "0001_initial")]
+
+    operations = [
+        migrations.AddField(
+            model_name="gdapsplugin",
+            name="meta_hash",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        )
+    ]
@@ -15,6 +15,8 @@ class GdapsPlugin(models.Model):
     category = models.CharField(max_length=255, blank=True, default="")
     visible = models.BooleanField(default=True)
     enabled = models.BooleanField(default=True)
+    # hash of the PluginMeta data that was copied into this model by syncplugins
+    meta_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
 
     def __str__(self):
         return self.verbose_name
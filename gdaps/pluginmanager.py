@@ -1,17 +1,26 @@
+import concurrent.futures
+import hashlib
+import heapq
+import json
 import os
+import sys
+import time
 
 import logging
 import importlib
+import importlib.util
+from importlib.machinery import ModuleSpec
+from types import ModuleType
 
 from django.apps import apps, AppConfig
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import QuerySet
-from pkg_resources import iter_entry_points
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from gdaps.api import PluginConfig
-from gdaps.exceptions import PluginError
+from gdaps.exceptions import IncompatibleVersionsError, PluginError
+from gdaps.profiling import profiler
 
 __all__ = ["PluginManager"]
 
@@ -50,6 +59,229 @@ logger = logging.getLogger(__name__)
 #         return cls._instances[cls]
 
 
+def _compatibility_requirements(meta) -> List[str]:
+    """Returns the ``PluginMeta.compatibility`` requirements as a list of strings.
+
+    ``compatibility`` may be unset, one requirement string, or a list of them.
+    """
+    compatibility = getattr(meta, "compatibility", None) or []
+    if isinstance(compatibility, str):
+        compatibility = [compatibility]
+    return [str(requirement) for requirement in compatibility if requirement]
+
+
+def _distributions_fingerprint() -> str:
+    """Returns a hash of ``sys.path`` and the installed distributions' metadata directories.
+
+    It changes when a distribution is installed, removed or updated, without reading any metadata.
+    """
+    sha = hashlib.sha1()
+    for path in sys.path:
+        sha.update(path.encode())
+        if not os.path.isdir(path or "."):
+            continue
+        try:
+            with os.scandir(path or ".") as entries:
+                for entry in sorted(entries, key=lambda e: e.name):
+                    if entry.name.endswith((".dist-info", ".egg-info", ".egg-link")):
+                        sha.update(entry.name.encode())
+                        sha.update(str(entry.stat().st_mtime_ns).encode())
+        except OSError:
+            continue
+    return sha.hexdigest()
+
+
+def _read_plugin_cache(cache_file: str) -> dict:
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or not isinstance(cache.get("groups"), dict):
+        return {}
+    return cache
+
+
+def _write_plugin_cache(cache_file: str, cache: dict) -> None:
+    # write to a temporary file first, so that concurrently starting processes never read a
+    # partially written cache file.
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write plugin cache file '{cache_file}': {e}")
+
+
+def _import_module(
+    app_name: str, submodule: str, search: bool = True
+) -> Tuple[Optional[ModuleType], float]:
+    """Imports a plugin's submodule, and returns it together with the time the import took.
+
+    If the module does not exist, ``None`` is returned instead. Errors raised while importing
+    an existing module are not caught.
+
+    :param search: If False, the module is known to exist and is not searched for first.
+    """
+    dotted_name = f"{app_name}.{submodule}"
+    start = time.perf_counter()
+    if search and _find_spec(dotted_name) is None:
+        module = None
+    else:
+        with profiler.record(app_name, submodule):
+            module = importlib.import_module(dotted_name)
+    return module, time.perf_counter() - start
+
+
+def _find_spec(dotted_name: str) -> Optional[ModuleSpec]:
+    try:
+        return importlib.util.find_spec(dotted_name)
+    except ImportError:
+        # parent is not a package
+        return None
+
+
+def _import_modules_parallel(
+    levels: List[List[str]], submodule: str
+) -> List[Tuple[Optional[ModuleType], float]]:
+    """Imports plugins' submodules concurrently, and returns them together with the time each
+    import took.
+
+    The module specs are searched in parallel first, so that only existing modules are imported.
+    Python's import system locks each module separately, so independent modules can be imported
+    at the same time. The submodules of one level of app names are imported after the ones of
+    the previous level are finished.
+
+    :param levels: lists of app names, see ``PluginManager.plugin_levels()``
+    :returns: the results in the order of the flattened ``levels``
+    """
+    app_names = [app_name for level in levels for app_name in level]
+    with concurrent.futures.ThreadPoolExecutor(
+        thread_name_prefix="gdaps-import"
+    ) as executor:
+        specs = iter(
+            executor.map(_find_spec, [f"{name}.{submodule}" for name in app_names])
+        )
+        results = []
+        for level in levels:
+            futures = [
+                executor.submit(_import_module, app_name, submodule, False)
+                if next(specs)
+                else None
+                for app_name in level
+            ]
+            results += [future.result() if future else (None, 0.0) for future in futures]
+        return results
+
+
+def _dependency_graph(app_configs: List[AppConfig]) -> Dict[str, Set[str]]:
+    """Returns the names of the plugins each plugin depends on, by its ``PluginMeta.dependencies``.
+
+    Dependencies on plugins that are not in ``app_configs`` are left out.
+    """
+    names = {app.name for app in app_configs}
+    return {
+        app.name: set(getattr(app.PluginMeta, "dependencies", None) or []) & names - {app.name}
+        for app in app_configs
+    }
+
+
+def _sort_by_dependencies(
+    app_configs: List[AppConfig],
+) -> Tuple[List[AppConfig], List[List[AppConfig]]]:
+    """Sorts plugins topologically by their dependencies.
+
+    Each plugin comes after all plugins it depends on. Apart from that, the order of
+    ``app_configs`` is kept.
+
+    :returns: the sorted plugins, and the same plugins grouped in levels: plugins of one level
+        only depend on plugins of earlier levels, so they can be loaded concurrently.
+    :raises PluginError: if the dependencies are circular.
+    """
+    graph = _dependency_graph(app_configs)
+    position = {app.name: i for i, app in enumerate(app_configs)}
+    dependents = {name: [] for name in graph}
+    for name, dependencies in graph.items():
+        for dependency in dependencies:
+            dependents[dependency].append(name)
+
+    remaining = {name: len(dependencies) for name, dependencies in graph.items()}
+    ready = [(position[name], name) for name, count in remaining.items() if not count]
+    heapq.heapify(ready)
+    order = []
+    level = {}
+    while ready:
+        index, name = heapq.heappop(ready)
+        order.append(app_configs[index])
+        level[name] = max((level[dependency] + 1 for dependency in graph[name]), default=0)
+        for dependent in dependents[name]:
+            remaining[dependent] -= 1
+            if not remaining[dependent]:
+                heapq.heappush(ready, (position[dependent], dependent))
+
+    if len(order) < len(app_configs):
+        raise PluginError(
+            "Circular dependencies between plugins: "
+            + ", ".join(app.name for app in app_configs if remaining[app.name])
+        )
+
+    levels = [[] for _i in range(max(level.values(), default=-1) + 1)]
+    for app in app_configs:
+        levels[level[app.name]].append(app)
+    return order, levels
+
+
+class _InlineExecutor(concurrent.futures.Executor):
+    """An executor that runs each submitted call immediately, in the calling thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _accepts_database(initialize) -> bool:
+    """Returns True if a plugin's ``initialize()`` method takes a ``database`` argument."""
+    import inspect
+
+    parameters = inspect.signature(initialize).parameters.values()
+    return any(
+        parameter.name == "database" or parameter.kind is parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+def _initialize_plugin(
+    app: Union[AppConfig, str], database: str, close_connections: bool = False
+) -> None:
+    """Calls the ``initialize()`` method of a plugin's PluginMeta in a transaction.
+
+    The database alias is passed to the method if it takes a ``database`` argument.
+
+    :param app: the plugin's AppConfig, or its label in worker processes
+    :param close_connections: If True, the database connections of the current thread are closed
+        afterwards, which is necessary in worker threads.
+    """
+    from django.db import connections, transaction
+
+    try:
+        if isinstance(app, str):
+            app = apps.get_app_config(app)
+        initialize = app.PluginMeta.initialize
+        with transaction.atomic(using=database):
+            if _accepts_database(initialize):
+                initialize(database=database)
+            else:
+                initialize()
+    finally:
+        if close_connections:
+            connections.close_all()
+
+
 class PluginManager:
     """A Generic Django Plugin Manager that finds Django app plugins in a
     plugins folder or setuptools entry points and loads them dynamically.
@@ -61,6 +293,27 @@ class PluginManager:
 
     group = ""
 
+    #: path of the file where discovered plugins are cached, see ``find_plugins()``.
+    cache_file = None
+
+    #: If True, submodules found missing by ``load_plugin_submodule()`` are saved in the
+    #: ``cache_file`` too, see ``find_plugins()``.
+    cache_missing_submodules = False
+
+    _import_caches_invalidated = False
+
+    # (app name, submodule) pairs that are known to not exist, see load_plugin_submodule()
+    _missing_submodules = set()
+
+    # cached results of plugins() and plugin_levels(), per value of skip_disabled, and the
+    # enabled plugins for the current version of the plugin state under "state"
+    _plugins_cache = {}
+    # the app registry's app_configs the cache was computed for
+    _plugins_cache_key = None
+
+    # results of check_compatibility(), keyed by a hash of the installed versions and requirements
+    _compatibility_cache = {}
+
     def __init__(self):
         raise PluginError("PluginManager is not meant to be instantiated.")
 
@@ -78,15 +331,28 @@ class PluginManager:
         return os.path.join(settings.BASE_DIR, *cls.group.split("."))
 
     @classmethod
-    def find_plugins(cls, group: str) -> List[str]:
+    def find_plugins(
+        cls, group: str, cache_file: str = None, cache_missing_submodules: bool = False
+    ) -> List[str]:
         """Finds plugins from setuptools entry points.
 
         This function is supposed to be called in settings.py after the
         INSTALLED_APPS variable. Therefore it can not use global variables from
         settings, to prevent circle imports.
 
+        Scanning all installed distributions for entry points takes some time. If a ``cache_file``
+        is given, the found plugins are saved there, together with a fingerprint of ``sys.path``
+        and the installed distributions. As long as this fingerprint does not change, the plugins
+        are read from the cache file and no scan is done. Use the ``rebuildplugincache``
+        management command to force a new scan.
+
         :param group: a dotted path where to find plugin apps. This is used as
             'group' for setuptools' entry points.
+        :param cache_file: path to a file where the found plugins are cached. No cache is used
+            if omitted.
+        :param cache_missing_submodules: If True, the submodules that ``load_plugin_submodule()`` did
+            not find in plugins are saved in the ``cache_file`` too, and are not searched for in
+            the next processes. Rebuild the cache when you add e.g. a ``urls.py`` to a plugin.
         :returns: A list of dotted app_names, which can be appended to
             INSTALLED_APPS.
         """
@@ -97,30 +363,187 @@ class PluginManager:
             )
 
         cls.group = group
+        cls.cache_file = cache_file
+        cls.cache_missing_submodules = cache_missing_submodules
+
+        if cache_file:
+            fingerprint = _distributions_fingerprint()
+            cache = _read_plugin_cache(cache_file)
+            if cache.get("fingerprint") == fingerprint and group in cache["groups"]:
+                logger.debug(f"Using cached plugins from '{cache_file}'.")
+                if cache_missing_submodules:
+                    cls._missing_submodules.update(
+                        tuple(item) for item in cache.get("missing_submodules", [])
+                    )
+                return cache["groups"][group]
+
+        installed_plugin_apps = cls._scan_entry_points(group)
 
-        installed_plugin_apps = []
-        for entry_point in iter_entry_points(group=group, name=None):
-            appname = entry_point.module_name
-            if entry_point.attrs:
-                # FIXME: adding an AppConfig does not work yet
-                appname += "." + ".".join(entry_point.attrs)
+        if cache_file:
+            if cache.get("fingerprint") != fingerprint:
+                cache = {"fingerprint": fingerprint, "groups": {}}
+            cache["groups"][group] = installed_plugin_apps
+            _write_plugin_cache(cache_file, cache)
+
+        return installed_plugin_apps
+
+    @classmethod
+    def rebuild_plugin_cache(cls) -> List[str]:
+        """Scans the entry points again and rewrites the cache file given to ``find_plugins()``.
+
+        :returns: A list of the found dotted app_names.
+        """
+        if not cls.group or not cls.cache_file:
+            raise ImproperlyConfigured(
+                "No plugin cache file configured. Please call "
+                "PluginManager.find_plugins() with a cache_file in your settings.py first."
+            )
+        installed_plugin_apps = cls._scan_entry_points(cls.group)
+        _write_plugin_cache(
+            cls.cache_file,
+            {
+                "fingerprint": _distributions_fingerprint(),
+                "groups": {cls.group: installed_plugin_apps},
+            },
+        )
+        return installed_plugin_apps
+
+    @staticmethod
+    def _scan_entry_points(group: str) -> List[str]:
+        from gdaps.metadata import entry_point_modules
 
-            installed_plugin_apps.append(appname)
+        # FIXME: adding an AppConfig does not work yet
+        # sort them, as the order of entry points depends on the file system.
+        installed_plugin_apps = sorted(entry_point_modules(group))
+        for appname in installed_plugin_apps:
             logger.info("Found plugin '{}'.".format(appname))
 
         return installed_plugin_apps
 
+    @classmethod
+    def check_compatibility(cls) -> List[IncompatibleVersionsError]:
+        """Checks the ``PluginMeta.compatibility`` requirements of all plugins at once.
+
+        ``compatibility`` may be one requirement string, or a list of them. Requirements are
+        checked against the installed distributions and the versions of all GDAPS plugins. Only
+        the distributions named in the requirements are looked up, and nothing at all if no
+        plugin declares requirements.
+
+        The result is cached, keyed by a fingerprint of the installed distributions and the
+        plugins' versions and requirements. A successful check is recorded in the
+        ``cache_file`` given to ``find_plugins()`` too, so later processes skip it as long as
+        nothing changes.
+
+        :returns: a list of all unsatisfied requirements. An empty list means all plugins are
+            compatible.
+        """
+        from gdaps.metadata import find_incompatibilities
+
+        requirements = []
+        plugin_versions = {}
+        for app in cls.plugins():
+            version = getattr(app.PluginMeta, "version", None)
+            if version:
+                plugin_versions[app.name] = str(version)
+            for requirement in _compatibility_requirements(app.PluginMeta):
+                requirements.append((app.name, requirement))
+        if not requirements:
+            return []
+
+        sha = hashlib.sha1(_distributions_fingerprint().encode())
+        sha.update(json.dumps([requirements, sorted(plugin_versions.items())]).encode())
+        key = sha.hexdigest()
+        try:
+            return cls._compatibility_cache[key]
+        except KeyError:
+            pass
+
+        cache = _read_plugin_cache(cls.cache_file) if cls.cache_file else {}
+        if cache.get("compatible") == key:
+            errors = []
+        else:
+            errors = find_incompatibilities(requirements, plugin_versions)
+            if not errors and cache:
+                cache["compatible"] = key
+                _write_plugin_cache(cls.cache_file, cache)
+
+        cls._compatibility_cache[key] = errors
+        return errors
+
     @staticmethod
     def plugins(skip_disabled: bool = False) -> List[PluginConfig]:
         """Returns a list of AppConfig classes that are GDAPS plugins.
 
         This method basically checks for the presence of a ``PluginMeta`` attribute
         within the AppConfig of all apps and returns a list of apps containing it.
+        The list is sorted topologically by ``PluginMeta.dependencies``: each plugin comes after the
+        plugins it depends on. Apart from that, it is sorted by ``PluginMeta.weight``, plugins with
+        equal weights are in INSTALLED_APPS order.
+        When the app registry is ready, the lists are computed only once and cached until the
+        registry changes, e.g. by ``override_settings(INSTALLED_APPS=...)`` in tests. Don't modify
+        the returned list.
+        :param skip_disabled: If True, skips disabled plugins and only returns enabled ones: plugins
+            whose ``PluginMeta.enabled`` is False, and plugins disabled in the admin, see
+            :mod:`gdaps.state`. Defaults to ``False``.
+        :raises PluginError: if the dependencies of the plugins are circular.
+        """
+        return PluginManager._sorted_plugins(skip_disabled)[0]
+
+    @staticmethod
+    def plugin_levels(skip_disabled: bool = False) -> List[List[PluginConfig]]:
+        """Returns the plugins of ``plugins()``, grouped in dependency levels.
+
+        The first level contains the plugins that don't depend on other plugins, each further
+        level the plugins that only depend on plugins of earlier levels. So the plugins of one
+        level can be loaded concurrently, once all earlier levels are loaded. Within a level, the
+        order of ``plugins()`` is kept. The levels are cached like ``plugins()``, don't modify them.
+
         :param skip_disabled: If True, skips disabled plugins and only returns enabled ones. Defaults to ``False``.
+        :raises PluginError: if the dependencies of the plugins are circular.
         """
+        return PluginManager._sorted_plugins(skip_disabled)[1]
 
-        # TODO: test plugins() method
-        list = []
+    @staticmethod
+    def _sorted_plugins(
+        skip_disabled: bool,
+    ) -> Tuple[List[PluginConfig], List[List[PluginConfig]]]:
+        if not apps.apps_ready:
+            return PluginManager._find_plugin_configs(skip_disabled)
+
+        # Django replaces the app_configs dict whenever the installed apps change.
+        if PluginManager._plugins_cache_key is not apps.app_configs:
+            PluginManager.clear_cache()
+            PluginManager._plugins_cache_key = apps.app_configs
+
+        cache = PluginManager._plugins_cache
+        try:
+            result = cache[skip_disabled]
+        except KeyError:
+            result = cache[skip_disabled] = PluginManager._find_plugin_configs(
+                skip_disabled
+            )
+        if not skip_disabled:
+            return result
+
+        # filter by the plugins' state in the database, once per version of the state
+        from gdaps.state import plugin_state
+
+        version = plugin_state.version()
+        if version is None:
+            return result
+        cached_version, enabled_result = cache.get("state", (None, None))
+        if cached_version != version:
+            enabled_result = _sort_by_dependencies(
+                [app for app in result[0] if plugin_state.is_enabled(app.name)]
+            )
+            cache["state"] = (version, enabled_result)
+        return enabled_result
+
+    @staticmethod
+    def _find_plugin_configs(
+        skip_disabled: bool,
+    ) -> Tuple[List[PluginConfig], List[List[PluginConfig]]]:
+        plugins = []
         for app in apps.get_app_configs():
             if not hasattr(app, "PluginMeta"):
                 continue
@@ -130,12 +553,29 @@ class PluginManager:
                 # skip disabled plugins per default
                 if not getattr(app.PluginMeta, "enabled", "True"):
                     continue
-            list.append(app)
+            plugins.append(app)
+
+        for app in plugins:
+            for dependency in getattr(app.PluginMeta, "dependencies", None) or []:
+                if not apps.is_installed(dependency):
+                    logger.warning(
+                        f"Plugin '{app.name}' depends on '{dependency}', which is not installed."
+                    )
+
+        # stable sort: INSTALLED_APPS order for equal weights
+        plugins.sort(key=lambda app: getattr(app.PluginMeta, "weight", 0))
+        return _sort_by_dependencies(plugins)
 
-        return list
+    @staticmethod
+    def clear_cache() -> None:
+        """Clears the cached lists of plugins, see ``plugins()`` and ``plugin_levels()``."""
+        PluginManager._plugins_cache = {}
+        PluginManager._plugins_cache_key = None
 
     @classmethod
-    def load_plugin_submodule(cls, submodule: str, mandatory=False) -> list:
+    def load_plugin_submodule(
+        cls, submodule: str, mandatory=False, parallel: bool = False
+    ) -> list:
         """
         Search plugin apps for specific submodules and load them.
 
@@ -146,22 +586,44 @@ class PluginManager:
             found and imported.
         :param mandatory: If set to True, each found plugin _must_ contain the given
             submodule. If any installed plugin doesn't have it, a PluginError is raised.
+        :param parallel: If set to True, the submodules are searched and imported concurrently
+            in a thread pool, one dependency level after the other (see ``plugin_levels()``).
+            This can speed up loading when there are many plugins.
         :return: a list of module objects that have been successfully imported.
         """
-        modules = []
-        importlib.invalidate_caches()
-        for app in PluginManager.plugins():
+        if not cls._import_caches_invalidated:
+            # plugins could have been created after the interpreter started
+            importlib.invalidate_caches()
+            cls._import_caches_invalidated = True
+
+        # skip submodules that are already known to be missing
+        missing = cls._missing_submodules
+        levels = []
+        for level in cls.plugin_levels() if parallel else [cls.plugins()]:
+            levels.append([])
+            for app in level:
+                if (app.name, submodule) not in missing:
+                    levels[-1].append(app)
+                elif mandatory:
+                    raise PluginError(
+                        f"The '{app.name}' app does not contain a (mandatory) '{submodule}' module"
+                    )
+        plugins = [app for level in levels for app in level]
 
-            # import all the submodules from all plugin apps
-            from gdaps.conf import gdaps_settings
+        if parallel:
+            results = _import_modules_parallel(
+                [[app.name for app in level] for level in levels], submodule
+            )
+        else:
+            results = [_import_module(app.name, submodule) for app in plugins]
 
+        modules = []
+        found_missing = False
+        for app, (module, duration) in zip(plugins, results):
             dotted_name = f"{app.name}.{submodule}"
-            try:
-                module = importlib.import_module(dotted_name)
-                logger.info(f" ✓ Successfully loaded submodule {dotted_name}")
-                modules.append(module)
-                logger.info(f" ✓ Loading plugin {dotted_name}")
-            except ImportError as e:
+            if module is None:
+                missing.add((app.name, submodule))
+                found_missing = True
                 if mandatory:
                     raise PluginError(
                         f"The '{app.name}' app does not contain a (mandatory) '{submodule}' module"
@@ -169,25 +631,41 @@ class PluginManager:
                 # ignore non-existing <submodule>.py files
                 # in plugins
                 logger.info(f" ✘ Ignoring missing submodule '{dotted_name}'.")
+            else:
+                logger.info(
+                    f" ✓ Successfully loaded submodule {dotted_name} ({duration * 1000:.1f} ms)"
+                )
+                modules.append(module)
+
+        if found_missing and cls.cache_missing_submodules and cls.cache_file:
+            cache = _read_plugin_cache(cls.cache_file)
+            if cache:
+                cache["missing_submodules"] = sorted(missing)
+                _write_plugin_cache(cls.cache_file, cache)
         return modules
 
     @staticmethod
-    def urlpatterns() -> list:
+    def urlpatterns(group: bool = False, indexed: bool = False) -> list:
         """Loads all plugins' urls.py and collects their urlpatterns.
 
         This is maybe not the best approach, but it allows plugins to
         have "global" URLs, and not only namespaced, and it is flexible
 
+        The urlpatterns are collected in the order of ``plugins()``, which is sorted by the plugins'
+        dependencies, ``PluginMeta.weight``, and by the order of INSTALLED_APPS for equal weights. So if two
+        plugins use the same URL, the one that comes first wins.
+
+        :param group: If True, patterns that start with the same literal path segment are nested
+            under a common prefix, see :func:`gdaps.routing.group_urlpatterns`. This only makes
+            resolving URLs faster with several hundred plugin URLs, and is slower with few of
+            them. ``indexed`` is faster in both cases.
+        :param indexed: If True, all patterns are wrapped into one
+            :class:`gdaps.routing.PluginURLResolver`, which finds the patterns that may match a
+            path by its static segments. This is the fastest option for many plugin URLs;
+            ``group`` is ignored then.
         :returns: a list of urlpatterns that can be merged with the global
                   urls.urlpattern."""
 
-        # FIXME: the order the plugins are loaded is not deterministic. This can lead to serious problems,
-        # as apps could use the same URL namespace, and depending on which one was loaded first, it may mask the other
-        # URL. This has to be fixed.
-        #
-        # Another unmanaged problem is 'dependencies':
-        # FIXME: a dependency manager must be implemented into the PluginManager
-
         # if gdaps.drf or gdaps.frontend is installed, use their urlpatterns automatically
         module_list = PluginManager.load_plugin_submodule("urls")
 
@@ -200,6 +678,17 @@ class PluginManager:
                 )
                 urlpatterns += pattern
 
+        if indexed:
+            from django.urls.resolvers import RoutePattern
+            from gdaps.routing import PluginURLResolver
+
+            return [PluginURLResolver(RoutePattern(""), urlpatterns)]
+
+        if group:
+            from gdaps.routing import group_urlpatterns
+
+            urlpatterns = group_urlpatterns(urlpatterns)
+
         return urlpatterns
 
     ###############################################################
@@ -219,3 +708,135 @@ class PluginManager:
         return GdapsPlugin.objects.exclude(
             name__in=[app.name for app in PluginManager.plugins()]
         )
+
+    @staticmethod
+    def initialize_plugins(
+        app_configs: Optional[Iterable[AppConfig]] = None,
+        database: str = "default",
+        pool: str = "thread",
+        max_workers: int = 1,
+        per_database: Optional[bool] = None,
+    ) -> None:
+        """Calls the ``PluginMeta.initialize()`` methods of plugins, each in its own transaction.
+
+        If a method takes a ``database`` argument, the alias of the database is passed to it, and
+        it is expected to write its data there, e.g. with ``call_command("loaddata", ...,
+        database=database)``. Methods without it write to the database chosen by the routers.
+
+        A plugin's method is called after the methods of all plugins listed in its
+        ``PluginMeta.dependencies``. By default, the methods are called one after the other, in the
+        order of ``plugins()``. With ``max_workers`` > 1, methods of plugins that don't depend on
+        each other are called concurrently, so this takes as long as the longest chain of
+        dependencies. Only use it if your plugins declare all their dependencies, and not with
+        SQLite, which locks the whole database for each writing transaction.
+
+        If a method fails, the others are called anyway, except the ones of plugins that depend
+        on it.
+
+        .. note:: This method needs Django's ORM to be running.
+
+        :param app_configs: the plugins to initialize. Defaults to all plugins. Dependencies on
+            plugins that are not in this list are ignored.
+        :param database: the alias of the database the transactions are opened in
+        :param pool: "thread" or "process". Worker processes are started freshly and set up
+            Django themselves, which makes sense if initializing is CPU bound.
+        :param max_workers: the maximum number of methods called at the same time. With 1, the
+            default, all methods are called in the current thread.
+        :param per_database: If True, only methods that take a ``database`` argument are called,
+            if False only the others. Plugins whose methods are not called don't hold up their
+            dependents. By default, all methods are called.
+        :raises PluginError: if the dependencies are circular, or if a method failed.
+        """
+        if app_configs is None:
+            app_configs = PluginManager.plugins()
+        # raises PluginError for circular dependencies before anything is called
+        app_configs, _levels = _sort_by_dependencies(list(app_configs))
+        waiting_for = _dependency_graph(app_configs)
+        dependents = {name: [] for name in waiting_for}
+        for name, dependencies in waiting_for.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+        hooks = {
+            app.name: app
+            for app in app_configs
+            if hasattr(app.PluginMeta, "initialize")
+            and (
+                per_database is None
+                or _accepts_database(app.PluginMeta.initialize) == per_database
+            )
+        }
+
+        if max_workers <= 1 or len(hooks) <= 1:
+            executor = _InlineExecutor()
+        elif pool == "process":
+            import django
+            import multiprocessing
+
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        elif pool == "thread":
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="gdaps-initialize"
+            )
+        else:
+            raise ValueError(f"Unknown pool: '{pool}'")
+
+        def submit(name: str) -> concurrent.futures.Future:
+            app = hooks[name]
+            if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+                # AppConfigs can't be pickled, worker processes look them up by label
+                app = app.label
+            return executor.submit(
+                _initialize_plugin,
+                app,
+                database,
+                not isinstance(executor, _InlineExecutor),
+            )
+
+        futures = {}
+
+        def finished(name: str) -> None:
+            # start the plugins that waited for this one only
+            for dependent in dependents[name]:
+                waiting_for[dependent].discard(name)
+                if not waiting_for[dependent]:
+                    start(dependent)
+
+        def start(name: str) -> None:
+            if name in hooks:
+                futures[submit(name)] = name
+            else:
+                # plugins without initialize() method just pass on to their dependents
+                finished(name)
+
+        failed = []
+        with executor:
+            for app in app_configs:
+                if not waiting_for[app.name]:
+                    start(app.name)
+            while futures:
+                done, _pending = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        logger.exception(f"Error calling initialize() method of '{name}' plugin")
+                        failed.append(name)
+                        continue
+                    logger.info(f" ✓ Initialized plugin '{name}'.")
+                    finished(name)
+
+        if failed:
+            skipped = [
+                name for name, dependencies in waiting_for.items() if dependencies and name in hooks
+            ]
+            raise PluginError(
+                f"Error calling initialize() method of plugin(s): {', '.join(failed)}"
+                + (f". Skipped dependent plugin(s): {', '.join(skipped)}" if skipped else "")
+            )
@@ -0,0 +1,124 @@
+"""
+This module provides the `profiler` object, that records how long loading each plugin takes.
+
+The profiler is disabled by default. It is enabled by setting the ``GDAPS_PROFILE_IMPORTS``
+environment variable, or by calling ``profiler.enable()``. The ``pluginprofile`` management
+command uses it to show which plugins slow down the start of Django.
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from importlib import import_module
+from typing import List
+
+__all__ = ["ImportProfiler", "profiler"]
+
+#: The environment variable that enables the profiler at startup.
+ENVIRONMENT_VARIABLE = "GDAPS_PROFILE_IMPORTS"
+
+
+class ImportProfiler:
+    """Records wall time, memory delta and newly imported modules of plugin loading steps.
+
+    Each record is a dict with the keys "plugin", "step", "time" (seconds), "memory" (bytes,
+    ``None`` if memory is not traced) and "modules" (a list of module names).
+
+    .. note:: Modules imported by other threads at the same time are attributed to the
+        step that is recorded, e.g. with ``load_plugin_submodule(..., parallel=True)``.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.records = []
+
+    def enable(self, trace_memory: bool = True) -> None:
+        """Starts recording.
+
+        :param trace_memory: If True, memory allocations are traced using ``tracemalloc``. This
+            slows down imports considerably, so times are not accurate then.
+        """
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        """Stops recording. Already recorded data is kept."""
+        self.enabled = False
+
+    @contextlib.contextmanager
+    def record(self, plugin: str, step: str):
+        """Context manager that records the code it runs as one step of loading a plugin."""
+        if not self.enabled:
+            yield
+            return
+
+        modules_before = set(sys.modules)
+        memory_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.records.append(
+                {
+                    "plugin": plugin,
+                    "step": step,
+                    "time": duration,
+                    "memory": tracemalloc.get_traced_memory()[0] - memory_before
+                    if self.trace_memory
+                    else None,
+                    "modules": sorted(set(sys.modules) - modules_before),
+                }
+            )
+
+
+profiler = ImportProfiler()
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    profiler.enable()
+
+
+def profile_plugins(
+    submodules: List[str], output_file: str, trace_memory: bool = True
+) -> None:
+    """Loads Django and the given plugin submodules with the profiler enabled, and writes the
+    records of all plugins as JSON into ``output_file``.
+
+    This must run in a fresh interpreter where Django is not set up yet, see the
+    ``pluginprofile`` management command.
+    """
+    import django
+    from django.conf import settings
+
+    profiler.enable(trace_memory=trace_memory)
+
+    # import the apps' modules before Django does, to see how long each one takes.
+    for entry in settings.INSTALLED_APPS:
+        with profiler.record(entry, "app"):
+            try:
+                import_module(entry)
+            except ImportError:
+                # dotted path to an AppConfig class
+                import_module(entry.rpartition(".")[0])
+
+    django.setup()
+
+    from gdaps.pluginmanager import PluginManager
+
+    for submodule in submodules:
+        PluginManager.load_plugin_submodule(submodule)
+
+    records = []
+    plugins = [app.name for app in PluginManager.plugins()]
+    for record in profiler.records:
+        for name in plugins:
+            if record["plugin"] == name or record["plugin"].startswith(name + "."):
+                records.append({**record, "plugin": name})
+                break
+
+    with open(output_file, "w") as f:
+        json.dump(records, f)
@@ -0,0 +1,179 @@
+"""
+This module contains helpers to make the URL patterns collected from plugins faster to resolve.
+"""
+import re
+from typing import List, Optional
+
+from django.urls import URLPattern, URLResolver
+from django.urls.resolvers import RegexPattern, RoutePattern
+from django.utils.functional import cached_property
+
+__all__ = ["group_urlpatterns", "PluginURLResolver"]
+
+
+def _literal_prefix(pattern) -> Optional[str]:
+    """Returns the first path segment of a pattern (e.g. "foo/"), if it is a literal string.
+
+    ``None`` is returned if the pattern can't be grouped: regex patterns, and routes that don't
+    start with a literal, complete path segment.
+    """
+    if not isinstance(pattern.pattern, RoutePattern):
+        return None
+    segment, slash, _rest = str(pattern.pattern).partition("/")
+    if not slash or not segment or "<" in segment:
+        return None
+    return segment + slash
+
+
+def _strip_prefix(pattern, prefix: str):
+    """Returns a copy of a pattern without the given prefix in its route."""
+    route = str(pattern.pattern)[len(prefix) :]
+    if isinstance(pattern, URLPattern):
+        return URLPattern(
+            RoutePattern(route, name=pattern.pattern.name, is_endpoint=True),
+            pattern.callback,
+            pattern.default_args,
+            pattern.name,
+        )
+    return URLResolver(
+        RoutePattern(route, name=pattern.pattern.name, is_endpoint=False),
+        pattern.urlconf_name,
+        pattern.default_kwargs,
+        pattern.app_name,
+        pattern.namespace,
+    )
+
+
+def group_urlpatterns(urlpatterns: list) -> list:
+    """Nests URL patterns that start with the same literal path segment under a shared prefix.
+
+    ``[path("foo/a/", ...), path("foo/b/", ...)]`` becomes ``[path("foo/", include([path("a/", ...),
+    path("b/", ...)]))]``. Django's resolver then only tests the nested patterns if the path starts
+    with "foo/", and skips all of them otherwise.
+
+    The patterns are matched in the same order as before: Only consecutive patterns are grouped,
+    patterns with regular expressions or dynamic first segments are left where they are and are
+    never passed by grouped patterns.
+
+    The nested resolvers add some overhead to each match, so grouping only pays off with several
+    hundred patterns. :class:`PluginURLResolver` is faster for any number of patterns.
+    """
+    result = []
+    # prefix -> list of patterns, of consecutive groupable patterns
+    block = {}
+
+    def flush():
+        for prefix, patterns in block.items():
+            if len(patterns) == 1:
+                result.append(patterns[0])
+            else:
+                result.append(
+                    URLResolver(
+                        RoutePattern(prefix),
+                        [_strip_prefix(pattern, prefix) for pattern in patterns],
+                    )
+                )
+        block.clear()
+
+    for pattern in urlpatterns:
+        prefix = _literal_prefix(pattern)
+        if prefix is None:
+            flush()
+            result.append(pattern)
+        else:
+            block.setdefault(prefix, []).append(pattern)
+    flush()
+    return result
+
+
+# characters that match themselves in a regex
+_regex_literal = re.compile(r"[\w\-/]*")
+
+
+def _static_segments(pattern) -> List[str]:
+    """Returns the complete, literal path segments a pattern starts with, e.g. ``["foo/", "bar/"]``
+    for ``path("foo/bar/<int:pk>/", ...)``.
+
+    A path can only match the pattern if it starts with these segments. Regular expressions are
+    examined conservatively: only literal characters after a leading "^" are taken into account,
+    and no segments are returned for expressions with alternatives.
+    """
+    if isinstance(pattern.pattern, RoutePattern):
+        literal = str(pattern.pattern).partition("<")[0]
+    elif isinstance(pattern.pattern, RegexPattern):
+        regex = pattern.pattern._regex
+        if not regex.startswith("^") or "|" in regex:
+            return []
+        literal = _regex_literal.match(regex, 1).group()
+        # a quantifier makes the last character optional, e.g. "^foo/?"
+        if regex[1 + len(literal) : 2 + len(literal)] in ("?", "*", "{"):
+            literal = literal[:-1]
+    else:
+        return []
+    return [segment + "/" for segment in literal.split("/")[:-1]]
+
+
+class _Node:
+    __slots__ = ("children", "indexes", "resolver")
+
+    def __init__(self):
+        self.children = {}
+        # indexes of the patterns that may match paths reaching this node
+        self.indexes = []
+        self.resolver = None
+
+
+class PluginURLResolver(URLResolver):
+    """A URL resolver that finds the patterns that may match a path using a trie of their static
+    path segments, instead of trying each pattern's regex in turn.
+
+    For ``"foo/bar/42/"``, only the patterns that start with ``"foo/bar/"``, ``"foo/"`` or with a
+    dynamic segment are tried, in their original order. The number of patterns to try doesn't
+    depend on the number of plugins, but on the number of segments in the path.
+
+    Reversing URLs, namespaces and included URLconfs work like with a normal ``URLResolver``.
+    Use it with ``PluginManager.urlpatterns(indexed=True)``.
+    """
+
+    @cached_property
+    def _trie(self) -> _Node:
+        root = _Node()
+        for index, pattern in enumerate(self.url_patterns):
+            node = root
+            for segment in _static_segments(pattern):
+                node = node.children.setdefault(segment, _Node())
+            node.indexes.append(index)
+        self._inherit_indexes(root, [])
+        return root
+
+    def _inherit_indexes(self, node: _Node, inherited: list) -> None:
+        node.indexes = sorted(inherited + node.indexes)
+        for child in node.children.values():
+            self._inherit_indexes(child, node.indexes)
+
+    def _node_resolver(self, node: _Node) -> URLResolver:
+        if node.resolver is None:
+            patterns = self.url_patterns
+            node.resolver = URLResolver(
+                self.pattern,
+                [patterns[index] for index in node.indexes],
+                self.default_kwargs,
+                self.app_name,
+                self.namespace,
+            )
+        return node.resolver
+
+    def resolve(self, path):
+        path = str(path)
+        match = self.pattern.match(path)
+        if not match:
+            return super().resolve(path)
+        remaining = match[0]
+        node = self._trie
+        while True:
+            segment, slash, remaining = remaining.partition("/")
+            child = node.children.get(segment + slash) if slash else None
+            if child is None:
+                break
+            node = child
+        return self._node_resolver(node).resolve(path)
@@ -0,0 +1,177 @@
+"""
+This module provides the `plugin_state` object, that tells whether plugins are enabled at runtime.
+
+Plugins can be enabled and disabled in the admin, which stores the flag in the ``GdapsPlugin``
+model. Reading it from the database for each request would be too slow, so ``plugin_state``
+loads the flags of all plugins once and shares them between processes using Django's cache
+framework, under a version key that changes whenever a ``GdapsPlugin`` is saved or synchronized.
+
+Each process checks the version key at most every ``GDAPS["PLUGIN_STATE_TIMEOUT"]`` seconds,
+so a change in the admin is picked up by all processes within this time. Set it to ``None`` to
+ignore the database, then only ``PluginMeta.enabled`` counts.
+
+If the cache backend is local to each process, like Django's default ``LocMemCache``, each
+process reads the flags from the database every ``PLUGIN_STATE_TIMEOUT`` seconds instead.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+__all__ = ["PluginState", "plugin_state"]
+
+logger = logging.getLogger(__name__)
+
+#: The key of the current version of the plugin state in Django's cache.
+STATE_VERSION_CACHE_KEY = "gdaps:plugin-state-version"
+
+#: The key of the enabled flags of all plugins in Django's cache, per version.
+STATE_CACHE_KEY = "gdaps:plugin-state:{}"
+
+#: Seconds the enabled flags of one version are kept in Django's cache. Older versions expire,
+#: processes that still need them read them from the database again.
+STATE_CACHE_TIMEOUT = 60 * 60
+
+
+def _cache_is_shared() -> bool:
+    """Returns False if Django's default cache is not shared between processes."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache))
+
+
+def _state_version(enabled: Dict[str, bool]) -> str:
+    return hashlib.sha1(json.dumps(sorted(enabled.items())).encode()).hexdigest()
+
+
+class PluginState:
+    """Caches the ``enabled`` flags of the ``GdapsPlugin`` model, shared between processes.
+
+    Plugins that are not in the database are enabled. If the database can't be read, e.g.
+    before the GDAPS migrations are applied, all plugins are enabled until the next check.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._enabled = {}
+        self._checked_at = None
+        # the version key in Django's cache the enabled flags were loaded for
+        self._cache_version = None
+        self._shared = None
+
+    @property
+    def timeout(self) -> Optional[float]:
+        from gdaps.conf import gdaps_settings
+
+        return gdaps_settings.PLUGIN_STATE_TIMEOUT
+
+    def version(self) -> Optional[str]:
+        """Returns the version of the state this process uses, after refreshing it if necessary.
+
+        The version changes whenever a plugin is enabled or disabled, so it can be used as a cache
+        key for anything computed from the state. ``None`` means that the database is ignored,
+        because ``PLUGIN_STATE_TIMEOUT`` is ``None``.
+        """
+        self._refresh()
+        return self._version
+
+    def is_enabled(self, name: str) -> bool:
+        """Returns False if the plugin with the given app name is disabled in the database.
+
+        Whether ``PluginMeta.enabled`` is set is not checked here.
+        """
+        self._refresh()
+        return self._enabled.get(name, True)
+
+    def invalidate(self) -> None:
+        """Makes all processes reload the state from the database.
+
+        This is called automatically when a ``GdapsPlugin`` is saved, or synchronized by
+        ``syncplugins``. This process reloads the state at the next access, others within
+        ``timeout`` seconds.
+        """
+        cache.set(STATE_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        self._checked_at = None
+
+    def _refresh(self) -> None:
+        timeout = self.timeout
+        if timeout is None:
+            self._version, self._enabled = None, {}
+            self._cache_version = self._checked_at = None
+            return
+
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < timeout:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < timeout:
+                # another thread refreshed it meanwhile
+                return
+
+            if self._shared is None:
+                self._shared = _cache_is_shared()
+                if not self._shared:
+                    logger.warning(
+                        "The plugin state is read from the database by each process, because "
+                        "the cache backend is not shared between processes. Use memcached, redis "
+                        "or the database cache to share it."
+                    )
+
+            cache_version = None
+            enabled = None
+            if self._shared:
+                cache.add(STATE_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+                cache_version = cache.get(STATE_VERSION_CACHE_KEY)
+                if cache_version is not None and cache_version == self._cache_version:
+                    self._checked_at = now
+                    return
+                if cache_version is not None:
+                    enabled = cache.get(STATE_CACHE_KEY.format(cache_version))
+
+            if enabled is None:
+                enabled = self._load()
+                if enabled is None:
+                    # try again at the next check
+                    cache_version, enabled = None, {}
+                elif cache_version is not None:
+                    # stored under the version read before the query: if a plugin was
+                    # changed meanwhile, the version has changed too and is loaded anew.
+                    cache.set(
+                        STATE_CACHE_KEY.format(cache_version), enabled, STATE_CACHE_TIMEOUT
+                    )
+
+            self._cache_version = cache_version
+            self._version, self._enabled = _state_version(enabled), enabled
+            self._checked_at = now
+
+    @staticmethod
+    def _load() -> Optional[Dict[str, bool]]:
+        from gdaps.models import GdapsPlugin
+
+        try:
+            # noinspection PyUnresolvedReferences
+            return dict(GdapsPlugin.objects.values_list("name", "enabled"))
+        except DatabaseError as e:
+            logger.debug(f"Could not load the plugin state from the database: {e}")
+            return None
+
+
+plugin_state = PluginState()
+
+
+# Only saving is watched: plugins are deleted by syncplugins only, which invalidates the state
+# itself once, and a post_delete receiver would keep Django from deleting them in bulk.
+@receiver(post_save, sender="gdaps.GdapsPlugin")
+def _invalidate_plugin_state(sender, using, **kwargs):
+    # other processes must not load the state before the change is committed
+    transaction.on_commit(plugin_state.invalidate, using=using)
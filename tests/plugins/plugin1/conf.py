@@ -1,4 +1,3 @@
-from django.test.signals import setting_changed
 from gdaps.conf import PluginSettings
 
 
@@ -26,12 +25,3 @@ plugin1_settings = PluginSettings(
     import_strings=IMPORT_STRINGS,
     removed_settings=REMOVED_SETTINGS,
 )
-
-
-def reload_plugin1_settings(*args, **kwargs):
-    setting = kwargs["setting"]
-    if setting == "FOOPLUGIN2":
-        plugin1_settings.reload()
-
-
-setting_changed.connect(reload_plugin1_settings)
@@ -0,0 +1,307 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+from gdaps.management.commands import syncplugins
+from gdaps.models import GdapsPlugin
+from gdaps.pluginmanager import PluginManager
+
+
+@pytest.mark.django_db
+def test_syncplugins_creates_plugins():
+    call_command("syncplugins")
+
+    # noinspection PyUnresolvedReferences
+    plugin1 = GdapsPlugin.objects.get(name="tests.plugins.plugin1")
+    assert plugin1.version == "0.0.1"
+    assert plugin1.verbose_name == "Plugin 1"
+    assert plugin1.author == "unknown"
+
+
+@pytest.mark.django_db
+def test_syncplugins_updates_changed_fields():
+    call_command("syncplugins")
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.filter(name="tests.plugins.plugin1").update(
+        verbose_name="Old name", vendor="Old vendor", meta_hash=""
+    )
+
+    call_command("syncplugins")
+
+    # noinspection PyUnresolvedReferences
+    plugin1 = GdapsPlugin.objects.get(name="tests.plugins.plugin1")
+    assert plugin1.verbose_name == "Plugin 1"
+    assert plugin1.vendor == ""
+
+
+@pytest.mark.django_db
+def test_syncplugins_stores_compatibility_list(monkeypatch):
+    from django.apps import apps
+
+    meta = apps.get_app_config("plugin1").PluginMeta
+    monkeypatch.setattr(
+        meta, "compatibility", ["django>=2.2", "semantic-version"], raising=False
+    )
+    PluginManager.clear_cache()
+    call_command("syncplugins")
+
+    # noinspection PyUnresolvedReferences
+    plugin1 = GdapsPlugin.objects.get(name="tests.plugins.plugin1")
+    assert plugin1.compatibility == "django>=2.2, semantic-version"
+
+
+@pytest.mark.django_db
+def test_syncplugins_removes_orphans():
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.create(name="tests.plugins.removed", verbose_name="Removed")
+
+    call_command("syncplugins")
+
+    # noinspection PyUnresolvedReferences
+    assert not GdapsPlugin.objects.filter(name="tests.plugins.removed").exists()
+    # noinspection PyUnresolvedReferences
+    assert GdapsPlugin.objects.filter(name="tests.plugins.plugin1").exists()
+
+
+@pytest.mark.django_db
+def test_syncplugins_query_count_is_constant(django_assert_num_queries):
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.bulk_create(
+        [GdapsPlugin(name=f"tests.plugins.removed{i}") for i in range(20)]
+    )
+    call_command("syncplugins")
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.filter(name="tests.plugins.plugin1").update(
+        vendor="Old vendor", meta_hash=""
+    )
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.bulk_create(
+        [GdapsPlugin(name=f"tests.plugins.removed{i}") for i in range(20)]
+    )
+
+    # select, migration check (2), savepoint, update, delete of all orphans, release
+    with django_assert_num_queries(7):
+        call_command("syncplugins")
+
+
+@pytest.mark.django_db
+def test_syncplugins_skips_unchanged_plugins(django_assert_num_queries):
+    call_command("syncplugins")
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.create(name="tests.plugins.removed")
+
+    out = StringIO()
+    # select, migration check (2), savepoint, delete of the orphan, release - no updates
+    with django_assert_num_queries(6):
+        call_command("syncplugins", stdout=out)
+    assert out.getvalue().strip() == "0 created, 0 updated, 2 unchanged, 1 orphaned."
+
+    out = StringIO()
+    with django_assert_num_queries(1):
+        call_command("syncplugins", stdout=out)
+    assert out.getvalue().strip() == "0 created, 0 updated, 2 unchanged, 0 orphaned."
+
+
+@pytest.mark.django_db
+def test_syncplugins_report():
+    out = StringIO()
+    call_command("syncplugins", stdout=out)
+    assert out.getvalue().strip() == "2 created, 0 updated, 0 unchanged, 0 orphaned."
+
+
+@pytest.mark.django_db(databases=["default", "other"], transaction=True)
+def test_syncplugins_all_databases():
+    # noinspection PyUnresolvedReferences
+    GdapsPlugin.objects.using("other").create(name="tests.plugins.removed")
+
+    out = StringIO()
+    call_command("syncplugins", all_databases=True, stdout=out)
+
+    assert out.getvalue().splitlines() == [
+        "default: 2 created, 0 updated, 0 unchanged, 0 orphaned.",
+        "other: 2 created, 0 updated, 0 unchanged, 1 orphaned.",
+    ]
+    for database in ("default", "other"):
+        # noinspection PyUnresolvedReferences
+        assert set(
+            GdapsPlugin.objects.using(database).values_list("name", flat=True)
+        ) == {"gdaps", "tests.plugins.plugin1"}
+
+
+@pytest.mark.django_db(databases=["default", "other"], transaction=True)
+def test_syncplugins_database_failure_is_isolated():
+    out = StringIO()
+    err = StringIO()
+    with pytest.raises(CommandError, match="missing"):
+        call_command(
+            "syncplugins", databases=["default", "missing"], stdout=out, stderr=err
+        )
+
+    assert out.getvalue().splitlines() == [
+        "default: 2 created, 0 updated, 0 unchanged, 0 orphaned."
+    ]
+    assert err.getvalue().startswith("missing: ConnectionDoesNotExist")
+    # noinspection PyUnresolvedReferences
+    assert GdapsPlugin.objects.filter(name="tests.plugins.plugin1").exists()
+
+
+class CountingMigrationLoader(MigrationLoader):
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        CountingMigrationLoader.instances += 1
+        super().__init__(*args, **kwargs)
+
+
+@pytest.fixture
+def migration_loader(monkeypatch):
+    CountingMigrationLoader.instances = 0
+    monkeypatch.setattr(syncplugins, "MigrationLoader", CountingMigrationLoader)
+    cache.clear()
+    yield CountingMigrationLoader
+    cache.clear()
+
+
+@pytest.mark.django_db(databases=["default", "other"])
+def test_migration_check_loads_graph_once(migration_loader):
+    command = syncplugins.Command()
+    assert command.is_database_synchronized("default")
+    assert command.is_database_synchronized("other")
+    assert command.is_database_synchronized("default")
+    assert migration_loader.instances == 1
+
+
+@pytest.mark.django_db
+def test_migration_check_detects_unapplied_migrations(migration_loader):
+    MigrationRecorder(connection).record_unapplied("gdaps", "0002_gdapsplugin_meta_hash")
+    assert not syncplugins.Command().is_database_synchronized("default")
+
+
+@pytest.mark.django_db
+def test_migration_check_trusts_recorded_state(migration_loader):
+    command = syncplugins.Command()
+    command.trust_migration_state = True
+    assert command.is_database_synchronized("default")
+    assert migration_loader.instances == 1
+
+    # a new command trusts the recorded state, and doesn't load the graph
+    command = syncplugins.Command()
+    command.trust_migration_state = True
+    assert command.is_database_synchronized("default")
+    assert migration_loader.instances == 1
+
+    # a changed state is checked again
+    MigrationRecorder(connection).record_unapplied("gdaps", "0002_gdapsplugin_meta_hash")
+    command = syncplugins.Command()
+    command.trust_migration_state = True
+    assert not command.is_database_synchronized("default")
+    assert migration_loader.instances == 2
+
+
+@pytest.mark.django_db(databases=["default", "other"], transaction=True)
+def test_syncplugins_all_databases_initialize(monkeypatch):
+    from django.apps import apps
+
+    calls = []
+
+    def initialize_per_database(database):
+        calls.append(("plugin1", database))
+
+    def initialize():
+        calls.append(("gdaps", None))
+
+    monkeypatch.setattr(
+        apps.get_app_config("plugin1").PluginMeta,
+        "initialize",
+        staticmethod(initialize_per_database),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        apps.get_app_config("gdaps").PluginMeta,
+        "initialize",
+        staticmethod(initialize),
+        raising=False,
+    )
+    call_command("syncplugins", all_databases=True, stdout=StringIO())
+
+    assert sorted(calls, key=str) == [
+        ("gdaps", None),
+        ("plugin1", "default"),
+        ("plugin1", "other"),
+    ]
+
+
+@pytest.mark.django_db(databases=["default", "other"], transaction=True)
+def test_syncplugins_all_databases_initialize_in_routed_database(monkeypatch):
+    from django.apps import apps
+    from django.db import connections, router
+
+    calls = []
+
+    def initialize():
+        calls.append(
+            [alias for alias in ("default", "other") if connections[alias].in_atomic_block]
+        )
+
+    monkeypatch.setattr(
+        apps.get_app_config("gdaps").PluginMeta,
+        "initialize",
+        staticmethod(initialize),
+        raising=False,
+    )
+    monkeypatch.setattr(router, "db_for_write", lambda model, **hints: "other")
+    call_command("syncplugins", all_databases=True, stdout=StringIO())
+
+    assert calls == [["other"]]
+
+
+@pytest.mark.django_db(databases=["default", "other"], transaction=True)
+def test_syncplugins_all_databases_initialize_failure(monkeypatch):
+    from django.apps import apps
+
+    def initialize():
+        raise ValueError("broken")
+
+    monkeypatch.setattr(
+        apps.get_app_config("gdaps").PluginMeta,
+        "initialize",
+        staticmethod(initialize),
+        raising=False,
+    )
+    stderr = StringIO()
+    with pytest.raises(CommandError) as excinfo:
+        call_command("syncplugins", all_databases=True, stdout=StringIO(), stderr=stderr)
+
+    assert str(excinfo.value) == "Initializing plugins failed"
+    assert "gdaps" in stderr.getvalue()
+    # both databases were synchronized nevertheless
+    # noinspection PyUnresolvedReferences
+    assert GdapsPlugin.objects.using("other").filter(name="gdaps").exists()
+
+
+@pytest.mark.django_db
+def test_migration_state_recorded_in_plugin_cache_file(
+    migration_loader, monkeypatch, tmp_path
+):
+    from gdaps import pluginmanager
+
+    cache_file = str(tmp_path / "plugins.json")
+    pluginmanager._write_plugin_cache(cache_file, {"fingerprint": "", "groups": {}})
+    monkeypatch.setattr(PluginManager, "cache_file", cache_file)
+
+    command = syncplugins.Command()
+    command.trust_migration_state = True
+    assert command.is_database_synchronized("default")
+    assert "default" in pluginmanager._read_plugin_cache(cache_file)["migration_states"]
+
+    # next process, with an empty Django cache
+    cache.clear()
+    command = syncplugins.Command()
+    command.trust_migration_state = True
+    assert command.is_database_synchronized("default")
+    assert migration_loader.instances == 1
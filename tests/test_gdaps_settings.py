@@ -71,3 +71,72 @@ def test_notallowed_removed_setting_access():
 
     with pytest.raises(AttributeError):
         settings.REMOVED_SETTING
+
+
+def test_single_import_string_is_not_a_substring():
+    defaults = {
+        "FOO": "tests.plugins.plugin1.api.interfaces.FirstInterface",
+        "FOO_PATH": "tests.plugins.plugin1.api.interfaces.FirstInterface",
+    }
+    settings = PluginSettings(
+        namespace=NAMESPACE, defaults=defaults, import_strings="FOO_PATH"
+    )
+
+    assert type(settings.FOO) is str
+    assert settings.FOO_PATH is FirstInterface
+
+
+def test_all_settings_resolved_at_first_access():
+    defaults = {"FOO": 1, "INTERFACE": "tests.plugins.plugin1.api.interfaces.FirstInterface"}
+    settings = PluginSettings(
+        namespace=NAMESPACE, defaults=defaults, import_strings=["INTERFACE"]
+    )
+
+    assert settings.FOO == 1
+    assert vars(settings)["INTERFACE"] is FirstInterface
+
+
+def test_reload_on_setting_changed():
+    from django.test import override_settings
+    from gdaps.conf import gdaps_settings
+
+    assert plugin1_settings.OVERRIDE == 20
+    admin = gdaps_settings.ADMIN
+    with override_settings(PLUGIN1={"OVERRIDE": 30}):
+        assert plugin1_settings.OVERRIDE == 30
+        # other namespaces keep their resolved settings
+        assert "ADMIN" in vars(gdaps_settings)
+    assert plugin1_settings.OVERRIDE == 20
+    assert gdaps_settings.ADMIN == admin
+
+
+def test_unknown_user_setting():
+    settings = PluginSettings(
+        namespace="PLUGIN1TEST", user_settings={"FOO": 1, "BLAHFOO": 2}, defaults={"FOO": 234}
+    )
+
+    with pytest.raises(RuntimeError, match="BLAHFOO"):
+        settings.FOO
+
+
+def test_removed_user_setting():
+    settings = PluginSettings(
+        namespace="PLUGIN1TEST",
+        user_settings={"REMOVED_SETTING": 1},
+        defaults={"FOO": 234},
+        removed_settings="REMOVED_SETTING",
+    )
+
+    with pytest.raises(RuntimeError, match="removed"):
+        settings.FOO
+
+
+def test_user_settings_of_shared_namespace():
+    other_settings = PluginSettings(namespace="PLUGIN1SHARED", defaults={"BAR": 1})
+    settings = PluginSettings(
+        namespace="PLUGIN1SHARED", user_settings={"BAR": 2}, defaults={"FOO": 234}
+    )
+
+    assert settings.FOO == 234
+    assert other_settings.BAR == 1
+
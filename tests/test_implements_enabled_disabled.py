@@ -54,3 +54,37 @@ def test_disabled_implementations():
 
     for i in INoop2:
         raise PluginError("Disabled extension was returned in Interface!")
+
+
+# ------------------------------------------------------------
+
+
+@Interface
+class IToggle:
+    pass
+
+
+class TogglePlugin(IToggle):
+    pass
+
+
+class ToggleChildPlugin(TogglePlugin):
+    pass
+
+
+def test_toggle_enabled_flag_at_runtime():
+    assert len(list(IToggle)) == 2
+
+    TogglePlugin.enabled = False
+    try:
+        # ToggleChildPlugin inherits the flag
+        assert list(IToggle) == []
+        assert len(IToggle) == 2
+
+        ToggleChildPlugin.enabled = True
+        assert [type(i) for i in IToggle] == [ToggleChildPlugin]
+    finally:
+        del TogglePlugin.enabled
+        del ToggleChildPlugin.enabled
+
+    assert len(list(IToggle)) == 2
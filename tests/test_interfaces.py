@@ -234,3 +234,39 @@ def test_interface_with_class_as_argument():
         @Interface(Baz)  # Interface must not have an argument
         class Foo:
             pass
+
+
+@Interface
+class IWeighted:
+    pass
+
+
+class Weighted10(IWeighted):
+    weight = 10
+
+
+class WeightedDefault(IWeighted):
+    pass
+
+
+class WeightedMinus5(IWeighted):
+    weight = -5
+
+
+class WeightedDefault2(IWeighted):
+    pass
+
+
+def test_implementations_sorted_by_weight():
+    assert [type(i) for i in IWeighted] == [
+        WeightedMinus5,
+        WeightedDefault,
+        WeightedDefault2,
+        Weighted10,
+    ]
+    assert [type(i) for i in IWeighted.all_plugins()] == [
+        WeightedMinus5,
+        WeightedDefault,
+        WeightedDefault2,
+        Weighted10,
+    ]
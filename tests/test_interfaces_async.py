@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from gdaps import Interface
+from gdaps.exceptions import InterfaceCallError
+
+
+@Interface
+class IAsyncHook:
+    def notify(self, value):
+        pass
+
+
+class AsyncHook(IAsyncHook):
+    async def notify(self, value):
+        await asyncio.sleep(0.1)
+        return value + 1
+
+
+class AnotherAsyncHook(IAsyncHook):
+    async def notify(self, value):
+        await asyncio.sleep(0.1)
+        return value + 2
+
+
+class SyncHook(IAsyncHook):
+    def notify(self, value):
+        return value + 3
+
+
+@Interface
+class IFailingAsyncHook:
+    async def notify(self):
+        pass
+
+
+class FailingAsyncHook(IFailingAsyncHook):
+    async def notify(self):
+        raise ValueError("failed")
+
+
+class WorkingAsyncHook(IFailingAsyncHook):
+    async def notify(self):
+        return "ok"
+
+
+def test_coroutine_methods_detected():
+    assert AsyncHook._coroutine_methods == {"notify"}
+    assert SyncHook._coroutine_methods == frozenset()
+
+
+def test_acall():
+    start = time.monotonic()
+    assert asyncio.run(IAsyncHook.acall("notify", 10)) == [11, 12, 13]
+    # coroutines run concurrently
+    assert time.monotonic() - start < 0.19
+
+
+def test_acall_max_concurrency():
+    start = time.monotonic()
+    results = asyncio.run(IAsyncHook.acall("notify", 10, max_concurrency=1))
+    assert results == [11, 12, 13]
+    assert time.monotonic() - start >= 0.2
+
+
+def test_acall_runs_sync_methods_outside_event_loop():
+    @Interface
+    class IThreadHook:
+        def thread(self):
+            pass
+
+    class ThreadHook(IThreadHook):
+        def thread(self):
+            return threading.current_thread()
+
+    async def main():
+        return threading.current_thread(), await IThreadHook.acall("thread")
+
+    loop_thread, results = asyncio.run(main())
+    assert results[0] is not loop_thread
+
+
+def test_acall_collects_errors():
+    with pytest.raises(InterfaceCallError) as excinfo:
+        asyncio.run(IFailingAsyncHook.acall("notify"))
+
+    assert excinfo.value.results == [None, "ok"]
+    [(impl, exception)] = excinfo.value.errors
+    assert type(impl) is FailingAsyncHook
+    assert isinstance(exception, ValueError)
+
+
+@Interface
+class ISlowSyncHook:
+    def notify(self):
+        pass
+
+
+class SlowSyncHook(ISlowSyncHook):
+    def notify(self):
+        time.sleep(0.1)
+        return threading.current_thread()
+
+
+class AnotherSlowSyncHook(ISlowSyncHook):
+    def notify(self):
+        time.sleep(0.1)
+        return threading.current_thread()
+
+
+def test_acall_sync_methods_concurrently():
+    start = time.monotonic()
+    first, second = asyncio.run(ISlowSyncHook.acall("notify"))
+    assert time.monotonic() - start < 0.19
+    assert first is not second
+
+
+def test_acall_thread_sensitive():
+    start = time.monotonic()
+    first, second = asyncio.run(ISlowSyncHook.acall("notify", thread_sensitive=True))
+    assert time.monotonic() - start >= 0.2
+    assert first is second
+
+
+def test_acall_closes_connections_in_worker_threads(monkeypatch):
+    import django.db
+
+    closed = []
+    monkeypatch.setattr(
+        django.db, "close_old_connections", lambda: closed.append(threading.current_thread())
+    )
+    threads = asyncio.run(ISlowSyncHook.acall("notify"))
+    assert sorted(map(id, closed)) == sorted(map(id, threads))
+
+    closed.clear()
+    asyncio.run(ISlowSyncHook.acall("notify", thread_sensitive=True))
+    assert closed == []
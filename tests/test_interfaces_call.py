@@ -0,0 +1,198 @@
+import concurrent.futures
+import operator
+import threading
+import time
+
+import pytest
+
+from gdaps import Interface
+from gdaps.exceptions import InterfaceCallError
+
+
+@Interface
+class IHook:
+    def compute(self, value):
+        pass
+
+    def lookup(self, key):
+        pass
+
+
+class Hook1(IHook):
+    def compute(self, value):
+        return value + 1
+
+    def lookup(self, key):
+        return None
+
+
+class Hook2(IHook):
+    def compute(self, value):
+        return value * 10
+
+    def lookup(self, key):
+        return f"hook2:{key}"
+
+
+class Hook3(IHook):
+    def compute(self, value):
+        return value
+
+    def lookup(self, key):
+        return f"hook3:{key}"
+
+
+@Interface
+class INonServiceHook:
+    __service__ = False
+
+    @classmethod
+    def name(cls):
+        return cls.__name__
+
+
+class NonServiceHook(INonServiceHook):
+    pass
+
+
+def test_call_collects_results():
+    assert IHook.call("compute", 2) == [3, 20, 2]
+    assert IHook.call("compute", value=3) == [4, 30, 3]
+
+
+def test_call_first():
+    assert IHook.call_first("lookup", "x") == "hook2:x"
+
+
+def test_call_reduce():
+    assert IHook.call_reduce("compute", operator.add, 0, 2) == 25
+
+
+def test_call_nonservice():
+    assert INonServiceHook.call("name") == ["NonServiceHook"]
+
+
+def test_call_follows_enabled_flag():
+    assert IHook.call("compute", 1) == [2, 10, 1]
+    Hook2.enabled = False
+    try:
+        assert IHook.call("compute", 1) == [2, 1]
+        assert IHook.call_first("lookup", "x") == "hook3:x"
+    finally:
+        del Hook2.enabled
+    assert IHook.call("compute", 1) == [2, 10, 1]
+
+
+def test_call_empty_interface():
+    @Interface
+    class IEmpty:
+        def foo(self):
+            pass
+
+    assert IEmpty.call("foo") == []
+    assert IEmpty.call_first("foo") is None
+    assert IEmpty.call_reduce("foo", operator.add, 5) == 5
+
+
+@Interface
+class ISlowHook:
+    def notify(self, value):
+        pass
+
+
+class SlowHook1(ISlowHook):
+    def notify(self, value):
+        time.sleep(0.2)
+        return value + 1
+
+
+class SlowHook2(ISlowHook):
+    def notify(self, value):
+        time.sleep(0.1)
+        return value + 2
+
+
+class SlowHook3(ISlowHook):
+    def notify(self, value):
+        time.sleep(0.2)
+        return value + 3
+
+
+@Interface
+class IFailingHook:
+    def notify(self):
+        pass
+
+
+class FailingHook1(IFailingHook):
+    def notify(self):
+        return 1
+
+
+class FailingHook2(IFailingHook):
+    def notify(self):
+        raise ValueError("failed")
+
+
+class FailingHook3(IFailingHook):
+    def notify(self):
+        time.sleep(0.5)
+        return 3
+
+
+def test_call_parallel_keeps_order():
+    start = time.monotonic()
+    assert ISlowHook.call_parallel("notify", 10) == [11, 12, 13]
+    # implementations run concurrently
+    assert time.monotonic() - start < 0.45
+
+
+def test_call_parallel_collects_errors():
+    with pytest.raises(InterfaceCallError) as excinfo:
+        IFailingHook.call_parallel("notify", timeout=0.2)
+
+    assert excinfo.value.results == [1, None, None]
+    errors = excinfo.value.errors
+    assert [type(impl) for impl, _ in errors] == [FailingHook2, FailingHook3]
+    assert isinstance(errors[0][1], ValueError)
+    assert isinstance(errors[1][1], concurrent.futures.TimeoutError)
+
+
+@Interface
+class IThreadHook:
+    def thread(self):
+        pass
+
+
+class ThreadHook1(IThreadHook):
+    def thread(self):
+        return threading.current_thread()
+
+
+class ThreadHook2(IThreadHook):
+    def thread(self):
+        return threading.current_thread()
+
+
+@Interface
+class INestedHook:
+    def notify(self):
+        pass
+
+
+class NestedHook(INestedHook):
+    def notify(self):
+        return threading.current_thread(), IThreadHook.call_parallel("thread", timeout=1)
+
+
+def test_call_parallel_nested_runs_inline(monkeypatch):
+    import gdaps
+
+    # a single thread would be blocked forever by a nested call waiting for the pool
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="gdaps-dispatch"
+    )
+    monkeypatch.setattr(gdaps, "_executor", executor)
+    with executor:
+        [(outer_thread, threads)] = INestedHook.call_parallel("notify", timeout=1)
+    assert threads == [outer_thread, outer_thread]
@@ -0,0 +1,123 @@
+import threading
+
+from gdaps import Interface, LazyService
+
+
+instances = []
+
+
+@Interface
+class ILazyService:
+    __lazy__ = True
+
+    def foo(self):
+        pass
+
+
+class LazyService1(ILazyService):
+    def __init__(self):
+        instances.append(self)
+
+    def foo(self):
+        return "foo"
+
+
+class LazyService2(ILazyService):
+    def __init__(self):
+        instances.append(self)
+
+
+class EagerService(ILazyService):
+    __lazy__ = False
+
+
+@Interface
+class ILazyWarmUp:
+    __lazy__ = True
+
+
+class WarmUpService1(ILazyWarmUp):
+    pass
+
+
+class WarmUpService2(ILazyWarmUp):
+    pass
+
+
+def test_lazy_service_not_instantiated_at_declaration():
+    assert [type(i) for i in ILazyService.all_plugins()] == [
+        LazyService,
+        LazyService,
+        EagerService,
+    ]
+    assert instances == []
+    assert LazyService1 in ILazyService
+
+
+def test_lazy_service_instantiated_on_iteration():
+    plugins = list(ILazyService)
+    assert [type(i) for i in plugins] == [LazyService1, LazyService2, EagerService]
+    assert len(instances) == 2
+
+    # no new instances on second iteration
+    assert list(ILazyService) == plugins
+    assert len(instances) == 2
+
+
+def test_lazy_service_attribute_access():
+    @Interface
+    class ILazy:
+        __lazy__ = True
+
+    created = []
+
+    class Lazy(ILazy):
+        def __init__(self):
+            created.append(self)
+
+        def bar(self):
+            return "bar"
+
+    proxy = ILazy._implementations[0]
+    assert isinstance(proxy, Lazy)
+    assert created == []
+    assert proxy.bar() == "bar"
+    assert proxy.bar() == "bar"
+    assert len(created) == 1
+    assert list(ILazy) == created
+
+
+def test_lazy_service_created_once_by_threads():
+    @Interface
+    class ILazyThreaded:
+        __lazy__ = True
+
+    created = []
+
+    class Threaded(ILazyThreaded):
+        def __init__(self):
+            created.append(self)
+
+        def bar(self):
+            pass
+
+    proxy = ILazyThreaded._implementations[0]
+    threads = [threading.Thread(target=lambda: proxy.bar()) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+
+
+def test_warm_up():
+    ILazyWarmUp.warm_up(WarmUpService2)
+    assert [type(i) for i in ILazyWarmUp.all_plugins()] == [
+        LazyService,
+        WarmUpService2,
+    ]
+    ILazyWarmUp.warm_up()
+    assert [type(i) for i in ILazyWarmUp.all_plugins()] == [
+        WarmUpService1,
+        WarmUpService2,
+    ]
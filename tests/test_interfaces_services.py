@@ -109,3 +109,14 @@ def test_service_plugins():
             i().foo()
 
         i.foo()
+
+
+def test_service_membership():
+    assert Service in IService
+    assert NonService1 not in IService
+
+
+def test_nonservice_membership():
+    assert NonServicePlugin1 in INonService2
+    assert NonService1 not in INonService2
+    assert Service not in INonService2
@@ -0,0 +1,45 @@
+import pytest
+
+from gdaps.exceptions import IncompatibleVersionsError
+from gdaps.metadata import entry_point_modules, find_incompatibilities, require
+
+
+def test_entry_point_modules_empty_group():
+    assert entry_point_modules("gdapstest_foo786578645786.plugins") == []
+
+
+def test_require_satisfied():
+    require("django>=2.2")
+
+
+def test_require_version_conflict():
+    with pytest.raises(IncompatibleVersionsError) as excinfo:
+        require("django<1.0")
+    assert excinfo.value.installed.startswith("django ")
+
+
+def test_require_not_installed():
+    with pytest.raises(IncompatibleVersionsError) as excinfo:
+        require("gdapstest-foo786578645786>=1.0")
+    assert excinfo.value.installed is None
+
+
+def test_require_plugin_version():
+    require("tests.plugins.plugin1>=0.0.1", {"tests-plugins-plugin1": "0.0.1"})
+    with pytest.raises(IncompatibleVersionsError):
+        require("tests.plugins.plugin1>=0.1", {"tests-plugins-plugin1": "0.0.1"})
+
+
+def test_find_incompatibilities_reports_all_conflicts():
+    errors = find_incompatibilities(
+        [
+            ("plugin_a", "django>=2.2"),
+            ("plugin_b", "django<1.0"),
+            ("plugin_c", "tests.plugins.plugin1>=0.0.1"),
+            ("plugin_d", "gdapstest-foo786578645786>=1.0"),
+        ],
+        {"tests.plugins.plugin1": "0.0.1"},
+    )
+    assert [str(e).split(":")[0] for e in errors] == ["plugin_b", "plugin_d"]
+    assert errors[0].installed.startswith("django ")
+    assert errors[1].installed is None
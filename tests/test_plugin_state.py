@@ -0,0 +1,120 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from gdaps import state
+from gdaps.models import GdapsPlugin
+from gdaps.pluginmanager import PluginManager
+from gdaps.state import PluginState, _cache_is_shared
+
+
+@pytest.fixture
+def plugin_state(monkeypatch):
+    """Replaces the plugin state of this process by a fresh one, with an empty shared cache."""
+    cache.clear()
+    # the tests' LocMemCache is shared by all PluginState objects of this process
+    monkeypatch.setattr(state, "_cache_is_shared", lambda: True)
+    plugin_state = PluginState()
+    monkeypatch.setattr(state, "plugin_state", plugin_state)
+    PluginManager.clear_cache()
+    yield plugin_state
+    PluginManager.clear_cache()
+    cache.clear()
+
+
+def _plugin_names(**kwargs):
+    return [app.name for app in PluginManager.plugins(**kwargs)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_disabled_in_database(plugin_state):
+    plugin = GdapsPlugin.objects.create(
+        name="tests.plugins.plugin1", verbose_name="Plugin 1", enabled=False
+    )
+    assert _plugin_names(skip_disabled=True) == ["gdaps"]
+    assert _plugin_names() == ["gdaps", "tests.plugins.plugin1"]
+
+    # saving invalidates the state of this process immediately
+    plugin.enabled = True
+    plugin.save()
+    assert _plugin_names(skip_disabled=True) == ["gdaps", "tests.plugins.plugin1"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_other_processes_within_timeout(plugin_state):
+    plugin = GdapsPlugin.objects.create(name="tests.plugins.plugin1", verbose_name="Plugin 1")
+    other_process = PluginState()
+    assert other_process.is_enabled("tests.plugins.plugin1")
+
+    plugin.enabled = False
+    plugin.save()
+    # stale until the timeout is over
+    assert other_process.is_enabled("tests.plugins.plugin1")
+    other_process._checked_at -= other_process.timeout
+    assert not other_process.is_enabled("tests.plugins.plugin1")
+
+
+@pytest.mark.django_db
+def test_state_loaded_once(plugin_state, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        plugin_state.is_enabled("gdaps")
+
+    # other processes read it from the shared cache
+    with django_assert_num_queries(0):
+        plugin_state.is_enabled("tests.plugins.plugin1")
+        assert PluginState().is_enabled("tests.plugins.plugin1")
+
+
+def test_state_disabled(plugin_state):
+    # no database access
+    with override_settings(GDAPS={"PLUGIN_STATE_TIMEOUT": None}):
+        assert plugin_state.version() is None
+        assert plugin_state.is_enabled("tests.plugins.plugin1")
+        assert _plugin_names(skip_disabled=True) == ["gdaps", "tests.plugins.plugin1"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_syncplugins_invalidates_once(plugin_state, monkeypatch):
+    from django.core.management import call_command
+    from gdaps.management.commands import syncplugins
+
+    calls = []
+    monkeypatch.setattr(syncplugins.plugin_state, "invalidate", lambda: calls.append(1))
+    GdapsPlugin.objects.create(name="tests.plugins.orphan1", verbose_name="Orphan 1")
+    GdapsPlugin.objects.create(name="tests.plugins.orphan2", verbose_name="Orphan 2")
+    calls.clear()
+
+    call_command("syncplugins")
+    assert calls == [1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_process_local_cache(plugin_state, monkeypatch, django_assert_num_queries):
+    monkeypatch.setattr(state, "_cache_is_shared", lambda: False)
+    plugin = GdapsPlugin.objects.create(name="tests.plugins.plugin1", verbose_name="Plugin 1")
+    other_process = PluginState()
+    assert other_process.is_enabled("tests.plugins.plugin1")
+    version = other_process.version()
+    assert version is not None
+
+    plugin.enabled = False
+    plugin.save()
+    with django_assert_num_queries(0):
+        assert other_process.is_enabled("tests.plugins.plugin1")
+    # the database is read again after the timeout
+    other_process._checked_at -= other_process.timeout
+    assert not other_process.is_enabled("tests.plugins.plugin1")
+    assert other_process.version() != version
+
+
+@pytest.mark.django_db
+def test_dummy_cache(plugin_state, monkeypatch):
+    # detect the backend
+    monkeypatch.setattr(state, "_cache_is_shared", _cache_is_shared)
+    with override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    ):
+        GdapsPlugin.objects.create(
+            name="tests.plugins.plugin1", verbose_name="Plugin 1", enabled=False
+        )
+        assert _plugin_names(skip_disabled=True) == ["gdaps"]
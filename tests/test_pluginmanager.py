@@ -1,6 +1,352 @@
+import json
+
+import pytest
+from django.test import override_settings
+
+from gdaps import pluginmanager, PluginError
 from gdaps.pluginmanager import PluginManager
 
 
 def test_pluginmanager_findplugins_empty():
     # try to find plugins from a nonexisting entry point
     assert PluginManager.find_plugins("gdapstest_foo786578645786.plugins") == []
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """Replaces the entry point scan, and records the scanned groups."""
+    scanned = []
+
+    def scan(group):
+        scanned.append(group)
+        return [f"{group}.foo"]
+
+    monkeypatch.setattr(PluginManager, "_scan_entry_points", staticmethod(scan))
+    monkeypatch.setattr(PluginManager, "group", PluginManager.group)
+    monkeypatch.setattr(PluginManager, "cache_file", PluginManager.cache_file)
+    return scanned
+
+
+def test_findplugins_cache(scans, tmp_path):
+    cache_file = str(tmp_path / "plugins.json")
+
+    assert PluginManager.find_plugins("gdapstest.plugins", cache_file) == [
+        "gdapstest.plugins.foo"
+    ]
+    assert scans == ["gdapstest.plugins"]
+    with open(cache_file) as f:
+        assert json.load(f)["groups"] == {
+            "gdapstest.plugins": ["gdapstest.plugins.foo"]
+        }
+
+    # second call is read from the cache
+    assert PluginManager.find_plugins("gdapstest.plugins", cache_file) == [
+        "gdapstest.plugins.foo"
+    ]
+    assert scans == ["gdapstest.plugins"]
+
+
+def test_findplugins_cache_invalidated(scans, tmp_path, monkeypatch):
+    cache_file = str(tmp_path / "plugins.json")
+
+    PluginManager.find_plugins("gdapstest.plugins", cache_file)
+    monkeypatch.setattr(pluginmanager, "_distributions_fingerprint", lambda: "changed")
+    PluginManager.find_plugins("gdapstest.plugins", cache_file)
+    assert scans == ["gdapstest.plugins", "gdapstest.plugins"]
+
+
+def test_findplugins_corrupt_cache(scans, tmp_path):
+    cache_file = tmp_path / "plugins.json"
+    cache_file.write_text("{not json")
+
+    assert PluginManager.find_plugins("gdapstest.plugins", str(cache_file)) == [
+        "gdapstest.plugins.foo"
+    ]
+    assert json.loads(cache_file.read_text())["groups"]
+
+
+def test_rebuild_plugin_cache(scans, tmp_path):
+    cache_file = str(tmp_path / "plugins.json")
+
+    PluginManager.find_plugins("gdapstest.plugins", cache_file)
+    PluginManager.rebuild_plugin_cache()
+    assert scans == ["gdapstest.plugins", "gdapstest.plugins"]
+
+
+def test_plugins():
+    plugins = PluginManager.plugins()
+    assert [app.name for app in plugins] == ["gdaps", "tests.plugins.plugin1"]
+    # cached
+    assert PluginManager.plugins() is plugins
+
+
+@pytest.mark.django_db
+def test_plugins_skip_disabled(monkeypatch):
+    from django.apps import apps
+
+    plugin1 = apps.get_app_config("plugin1")
+    monkeypatch.setattr(plugin1.PluginMeta, "enabled", False, raising=False)
+    PluginManager.clear_cache()
+    try:
+        assert [app.name for app in PluginManager.plugins(skip_disabled=True)] == [
+            "gdaps"
+        ]
+        assert len(PluginManager.plugins()) == 2
+    finally:
+        PluginManager.clear_cache()
+
+
+def test_plugins_invalidated_by_installed_apps():
+    plugins = PluginManager.plugins()
+    with override_settings(INSTALLED_APPS=["gdaps"]):
+        assert [app.name for app in PluginManager.plugins()] == ["gdaps"]
+    assert PluginManager.plugins() == plugins
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_load_plugin_submodule(parallel):
+    modules = PluginManager.load_plugin_submodule("api", parallel=parallel)
+    assert [m.__name__ for m in modules] == ["gdaps.api", "tests.plugins.plugin1.api"]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_load_plugin_submodule_missing(parallel):
+    modules = PluginManager.load_plugin_submodule("conf", parallel=parallel)
+    assert [m.__name__ for m in modules] == ["gdaps.conf", "tests.plugins.plugin1.conf"]
+    assert PluginManager.load_plugin_submodule("foo_missing", parallel=parallel) == []
+    with pytest.raises(PluginError):
+        PluginManager.load_plugin_submodule(
+            "foo_missing", mandatory=True, parallel=parallel
+        )
+
+
+@pytest.fixture
+def missing_submodules(monkeypatch):
+    missing = set()
+    monkeypatch.setattr(PluginManager, "_missing_submodules", missing)
+    return missing
+
+
+def test_missing_submodules_cached(missing_submodules, monkeypatch):
+    PluginManager.load_plugin_submodule("foo_missing")
+    assert missing_submodules == {
+        ("gdaps", "foo_missing"),
+        ("tests.plugins.plugin1", "foo_missing"),
+    }
+
+    def find_spec(dotted_name):
+        raise AssertionError(f"{dotted_name} should not be searched again.")
+
+    monkeypatch.setattr(pluginmanager, "_find_spec", find_spec)
+    assert PluginManager.load_plugin_submodule("foo_missing") == []
+    with pytest.raises(PluginError):
+        PluginManager.load_plugin_submodule("foo_missing", mandatory=True)
+
+
+def test_missing_submodules_persisted(scans, missing_submodules, tmp_path):
+    cache_file = str(tmp_path / "plugins.json")
+    PluginManager.find_plugins(
+        "gdapstest.plugins", cache_file, cache_missing_submodules=True
+    )
+    PluginManager.load_plugin_submodule("foo_missing")
+    with open(cache_file) as f:
+        assert json.load(f)["missing_submodules"] == [
+            ["gdaps", "foo_missing"],
+            ["tests.plugins.plugin1", "foo_missing"],
+        ]
+
+    # next process
+    missing_submodules.clear()
+    PluginManager.find_plugins(
+        "gdapstest.plugins", cache_file, cache_missing_submodules=True
+    )
+    assert ("gdaps", "foo_missing") in missing_submodules
+
+
+def test_plugins_sorted_by_weight(monkeypatch):
+    from django.apps import apps
+
+    monkeypatch.setattr(apps.get_app_config("gdaps").PluginMeta, "weight", 10, raising=False)
+    PluginManager.clear_cache()
+    try:
+        assert [app.name for app in PluginManager.plugins()] == [
+            "tests.plugins.plugin1",
+            "gdaps",
+        ]
+    finally:
+        PluginManager.clear_cache()
+
+
+def _plugin(name, calls, dependencies=(), fail=False):
+    from types import SimpleNamespace
+
+    def initialize():
+        calls.append(name)
+        if fail:
+            raise RuntimeError(name)
+
+    return SimpleNamespace(
+        name=name,
+        label=name,
+        PluginMeta=SimpleNamespace(
+            initialize=initialize, dependencies=list(dependencies)
+        ),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_initialize_plugins_respects_dependencies(max_workers):
+    calls = []
+    plugins = [
+        _plugin("c", calls, ["b"]),
+        _plugin("b", calls, ["a", "missing"]),
+        _plugin("a", calls),
+        _plugin("d", calls),
+    ]
+    PluginManager.initialize_plugins(plugins, max_workers=max_workers)
+    assert sorted(calls) == ["a", "b", "c", "d"]
+    assert calls.index("a") < calls.index("b") < calls.index("c")
+
+
+def test_initialize_plugins_circular_dependencies():
+    calls = []
+    plugins = [_plugin("a", calls, ["b"]), _plugin("b", calls, ["a"])]
+    with pytest.raises(PluginError):
+        PluginManager.initialize_plugins(plugins)
+    assert calls == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_initialize_plugins_skips_dependents_of_failed_plugins():
+    calls = []
+    plugins = [
+        _plugin("a", calls, fail=True),
+        _plugin("b", calls, ["a"]),
+        _plugin("c", calls),
+    ]
+    with pytest.raises(PluginError, match="Skipped dependent plugin\\(s\\): b"):
+        PluginManager.initialize_plugins(plugins, max_workers=1)
+    assert sorted(calls) == ["a", "c"]
+
+
+@pytest.fixture
+def compatibility(monkeypatch):
+    """Sets the compatibility requirements of plugin1, and records distribution lookups."""
+    from django.apps import apps
+    from gdaps import metadata
+
+    lookups = []
+    versions = {"django": "2.2.0"}
+
+    def installed_version(name):
+        lookups.append(name)
+        return versions.get(name)
+
+    monkeypatch.setattr(metadata, "_installed_version", installed_version)
+    monkeypatch.setattr(PluginManager, "_compatibility_cache", {})
+    monkeypatch.setattr(PluginManager, "cache_file", None)
+    meta = apps.get_app_config("plugin1").PluginMeta
+
+    def set_requirements(requirements):
+        monkeypatch.setattr(meta, "compatibility", requirements, raising=False)
+
+    return set_requirements, lookups
+
+
+def test_check_compatibility(compatibility):
+    set_requirements, lookups = compatibility
+    set_requirements(["django>=2.2", "django<1.0", "gdapstest-foo786578645786"])
+    errors = PluginManager.check_compatibility()
+    assert len(errors) == 2
+    assert PluginManager.check_compatibility() == errors
+    assert lookups == ["django", "django", "gdapstest-foo786578645786"]
+
+    set_requirements("django>=2.2")
+    assert PluginManager.check_compatibility() == []
+    assert len(lookups) == 4
+
+
+def test_check_compatibility_without_requirements(compatibility, monkeypatch):
+    from gdaps import pluginmanager
+
+    set_requirements, lookups = compatibility
+    set_requirements("")
+
+    def fingerprint():
+        raise AssertionError("the distributions must not be scanned")
+
+    monkeypatch.setattr(pluginmanager, "_distributions_fingerprint", fingerprint)
+    assert PluginManager.check_compatibility() == []
+    assert lookups == []
+
+
+def test_check_compatibility_persisted(compatibility, scans, tmp_path):
+    set_requirements, lookups = compatibility
+    set_requirements("django>=2.2")
+    PluginManager.find_plugins("gdapstest.plugins", str(tmp_path / "plugins.json"))
+    assert PluginManager.check_compatibility() == []
+
+    # next process
+    PluginManager._compatibility_cache.clear()
+    assert PluginManager.check_compatibility() == []
+    assert len(lookups) == 1
+
+
+def test_plugins_sorted_by_dependencies(monkeypatch):
+    from django.apps import apps
+
+    gdaps_meta = apps.get_app_config("gdaps").PluginMeta
+    monkeypatch.setattr(gdaps_meta, "dependencies", ["tests.plugins.plugin1"], raising=False)
+    PluginManager.clear_cache()
+    try:
+        assert [app.name for app in PluginManager.plugins()] == [
+            "tests.plugins.plugin1",
+            "gdaps",
+        ]
+        assert [[app.name for app in level] for level in PluginManager.plugin_levels()] == [
+            ["tests.plugins.plugin1"],
+            ["gdaps"],
+        ]
+    finally:
+        PluginManager.clear_cache()
+
+
+def test_plugin_levels_without_dependencies():
+    assert PluginManager.plugin_levels() == [PluginManager.plugins()]
+
+
+def test_plugins_circular_dependencies(monkeypatch):
+    from django.apps import apps
+
+    monkeypatch.setattr(
+        apps.get_app_config("gdaps").PluginMeta,
+        "dependencies",
+        ["tests.plugins.plugin1"],
+        raising=False,
+    )
+    monkeypatch.setattr(
+        apps.get_app_config("plugin1").PluginMeta, "dependencies", ["gdaps"], raising=False
+    )
+    PluginManager.clear_cache()
+    try:
+        with pytest.raises(PluginError):
+            PluginManager.plugins()
+    finally:
+        PluginManager.clear_cache()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_initialize_plugins_waits_for_plugins_without_initialize():
+    from types import SimpleNamespace
+
+    calls = []
+    plugins = [
+        _plugin("c", calls, ["b"]),
+        SimpleNamespace(
+            name="b", label="b", PluginMeta=SimpleNamespace(dependencies=["a"])
+        ),
+        _plugin("a", calls),
+    ]
+    PluginManager.initialize_plugins(plugins, max_workers=4)
+    assert calls == ["a", "c"]
@@ -0,0 +1,42 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+
+from gdaps.profiling import ImportProfiler
+
+
+def test_profiler_disabled():
+    profiler = ImportProfiler()
+    with profiler.record("foo", "app"):
+        pass
+    assert profiler.records == []
+
+
+def test_profiler_records():
+    profiler = ImportProfiler()
+    profiler.enable(trace_memory=False)
+    with profiler.record("foo", "app"):
+        import tests.plugins.plugin2.apps  # noqa
+
+    [record] = profiler.records
+    assert record["plugin"] == "foo"
+    assert record["step"] == "app"
+    assert record["time"] > 0
+    assert record["memory"] is None
+    assert "tests.plugins.plugin2.apps" in record["modules"]
+
+
+def test_pluginprofile_cmd():
+    out = StringIO()
+    call_command("pluginprofile", "conf", "--json", "--no-memory", stdout=out)
+    records = json.loads(out.getvalue())
+    steps = {(record["plugin"], record["step"]) for record in records}
+    assert ("tests.plugins.plugin1", "app") in steps
+    assert ("tests.plugins.plugin1", "conf") in steps
+
+
+def test_pluginprofile_cmd_table():
+    out = StringIO()
+    call_command("pluginprofile", stdout=out)
+    assert "tests.plugins.plugin1" in out.getvalue()
@@ -0,0 +1,136 @@
+from django.urls import URLResolver, path, re_path, include, Resolver404
+from django.urls.resolvers import RegexPattern
+
+import pytest
+
+from gdaps.routing import group_urlpatterns, PluginURLResolver
+
+
+def view(request, **kwargs):
+    pass
+
+
+included = [path("detail/<int:pk>/", view, name="included-detail")]
+
+urlpatterns = [
+    path("foo/", view, name="foo-index"),
+    path("foo/<int:pk>/", view, name="foo-detail"),
+    path("bar/", view, name="bar-index"),
+    path("foo/list/", view, name="foo-list"),
+    path("<slug:slug>/", view, name="slug"),
+    path("foo/after-slug/", view, name="foo-after-slug"),
+    path("baz/", include(included)),
+    path("baz/extra/", view, name="baz-extra"),
+    path("single/", view, name="single"),
+]
+
+
+def resolver(patterns):
+    return URLResolver(RegexPattern(r"^/"), patterns)
+
+
+def test_group_urlpatterns_structure():
+    grouped = group_urlpatterns(urlpatterns)
+    assert [str(p.pattern) for p in grouped] == [
+        "foo/",
+        "bar/",
+        "<slug:slug>/",
+        "foo/after-slug/",
+        "baz/",
+        "single/",
+    ]
+    assert isinstance(grouped[0], URLResolver)
+    assert [str(p.pattern) for p in grouped[0].url_patterns] == ["", "<int:pk>/", "list/"]
+    # single patterns are not touched
+    assert grouped[1] is urlpatterns[2]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/foo/",
+        "/foo/42/",
+        "/foo/list/",
+        "/bar/",
+        "/xyz/",
+        "/foo/after-slug/",
+        "/baz/detail/3/",
+        "/baz/extra/",
+        "/single/",
+    ],
+)
+def test_group_urlpatterns_resolves_same(url):
+    expected = resolver(urlpatterns).resolve(url)
+    match = resolver(group_urlpatterns(urlpatterns)).resolve(url)
+    assert match.url_name == expected.url_name
+    assert match.kwargs == expected.kwargs
+
+
+def test_group_urlpatterns_not_found():
+    with pytest.raises(Resolver404):
+        resolver(group_urlpatterns(urlpatterns)).resolve("/foo/bar/baz/")
+
+
+def test_group_urlpatterns_reverse():
+    grouped = resolver(group_urlpatterns(urlpatterns))
+    assert grouped.reverse("foo-detail", pk=42) == "foo/42/"
+    assert grouped.reverse("included-detail", pk=3) == "baz/detail/3/"
+
+
+regex_urlpatterns = [
+    re_path(r"^foo/(?P<pk>[0-9]+)/$", view, name="re-foo-detail"),
+    re_path(r"^bar/?$", view, name="re-bar"),
+    re_path(r"^(foo|qux)/alt/$", view, name="re-alt"),
+    re_path(r"baz/extra/$", view, name="re-baz-extra"),
+]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/foo/",
+        "/foo/42/",
+        "/foo/list/",
+        "/bar/",
+        "/bar",
+        "/xyz/",
+        "/qux/alt/",
+        "/foo/after-slug/",
+        "/baz/detail/3/",
+        "/baz/extra/",
+        "/single/",
+    ],
+)
+def test_plugin_url_resolver_resolves_same(url):
+    patterns = regex_urlpatterns + urlpatterns
+    expected = resolver(patterns).resolve(url)
+    match = PluginURLResolver(RegexPattern(r"^/"), patterns).resolve(url)
+    assert match.url_name == expected.url_name
+    assert match.kwargs == expected.kwargs
+    assert match.route == expected.route
+
+
+def test_plugin_url_resolver_candidates():
+    indexed = PluginURLResolver(RegexPattern(r"^/"), regex_urlpatterns + urlpatterns)
+    root = indexed._trie
+    assert set(root.children) == {"foo/", "bar/", "baz/", "single/"}
+    # "^bar/?$" and the regexes with alternatives or without "^" can't be indexed
+    assert [indexed.url_patterns[i].name for i in root.indexes] == [
+        "re-bar",
+        "re-alt",
+        "re-baz-extra",
+        "slug",
+    ]
+
+
+def test_plugin_url_resolver_not_found():
+    with pytest.raises(Resolver404):
+        PluginURLResolver(RegexPattern(r"^/"), urlpatterns).resolve("/foo/bar/baz/")
+    with pytest.raises(Resolver404):
+        PluginURLResolver(RegexPattern(r"^/"), urlpatterns).resolve("foo/")
+
+
+def test_plugin_url_resolver_reverse():
+    indexed = PluginURLResolver(RegexPattern(r"^/"), urlpatterns)
+    assert indexed.reverse("foo-detail", pk=42) == "foo/42/"
+    assert indexed.reverse("included-detail", pk=3) == "baz/detail/3/"